@@ -5,8 +5,11 @@ import plotly.graph_objects as go
 import pyodbc
 from sqlalchemy import create_engine, text
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import io
 from datetime import datetime
-from config import get_connection_string
+from config import check_driver, get_engine_url
 
 # Page configuration
 st.set_page_config(
@@ -41,44 +44,180 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def load_data():
-    """Load data from SQL Server database"""
-    try:
-        # Get connection string from config
-        CONN_STR = get_connection_string()
-        
-        # Create SQLAlchemy engine
-        engine = create_engine(f'mssql+pyodbc:///?odbc_connect={CONN_STR}')
-        
-        # Query to get all customers data
-        query = """
-        SELECT 
-            CustomerID,
-            CompanyName,
-            ContactName,
-            ContactTitle,
-            Address,
-            City,
-            Region,
-            PostalCode,
-            Country,
-            Phone,
-            Fax
-        FROM Customers
-        """
-        
-        # Load data into pandas DataFrame
-        df = pd.read_sql(query, engine)
-        
-        # Clean the data
-        df = df.fillna('N/A')
-        
-        return df
-    
-    except Exception as e:
-        st.error(f"Error connecting to database: {str(e)}")
-        return None
+@st.cache_resource
+def get_engine():
+    """Create the SQLAlchemy engine once and share its connection pool across sessions"""
+    check_driver()
+    return create_engine(
+        get_engine_url(),
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=5,
+        fast_executemany=True
+    )
+
+# Hash DataFrame cache arguments from their row hashes rather than a pickle dump
+HASH_FUNCS = {
+    pd.DataFrame: lambda d: (len(d), tuple(d.columns), int(pd.util.hash_pandas_object(d, index=False).sum()))
+}
+
+# Rows sent to the browser per table page
+PAGE_SIZE = 50
+
+# Customer columns shown and exported; helper columns such as '_search' stay internal
+CUSTOMER_COLUMNS = [
+    'CustomerID', 'CompanyName', 'ContactName', 'ContactTitle', 'Address',
+    'City', 'Region', 'PostalCode', 'Country', 'Phone', 'Fax'
+]
+
+def read_string_columns(engine, query, params=(), batch_size=5000):
+    """Run a query on a raw DB-API cursor and build Arrow-backed string columns batch by batch"""
+    with engine.raw_connection() as raw:
+        cursor = raw.cursor()
+        cursor.execute(query, params)
+        names = [column[0] for column in cursor.description]
+        columns = [[] for _ in names]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            # Transpose the batch once and extend each column in bulk
+            for column, values in zip(columns, zip(*rows)):
+                column.extend(values)
+        cursor.close()
+    
+    return pd.DataFrame({name: pd.array(values, dtype='string[pyarrow]') for name, values in zip(names, columns)})
+
+# Persisted to disk so app restarts reload the pickled frame instead of
+# re-querying SQL Server. Streamlit ignores ttl for persisted caches, so the
+# frame stays cached until `streamlit cache clear`. Errors are raised rather
+# than returned so a failed load never ends up in the cache.
+@st.cache_data(persist="disk", show_spinner=False, max_entries=32, hash_funcs=HASH_FUNCS)
+def load_data(country=None, city=None):
+    """Load customers from SQL Server, filtered by country and city in the query"""
+    # Reuse the shared SQLAlchemy engine
+    engine = get_engine()
+    
+    # Query customers; a NULL parameter disables that filter
+    query = """
+    SELECT 
+        CustomerID,
+        CompanyName,
+        ContactName,
+        ContactTitle,
+        Address,
+        City,
+        Region,
+        PostalCode,
+        Country,
+        Phone,
+        Fax
+    FROM Customers
+    WHERE (? IS NULL OR Country = ?)
+      AND (? IS NULL OR City = ?)
+    """
+    
+    # Load data into pandas DataFrame
+    df = read_string_columns(engine, query, (country, country, city, city))
+    
+    # Clean the data; only columns that actually carry NULLs (Region, Fax, ...) are rewritten
+    for col in df.columns[df.isna().any()]:
+        df[col] = df[col].fillna('N/A')
+    
+    # Low-cardinality columns as categoricals for cheaper counts and comparisons
+    for col in ('Country', 'City', 'Region', 'ContactTitle', 'ContactName'):
+        df[col] = df[col].astype('category')
+    
+    # Lower-cased search text built once per load instead of on every keystroke
+    df['_search'] = (
+        df['CompanyName'].astype(str) + '\x1f' +
+        df['ContactName'].astype(str) + '\x1f' +
+        df['City'].astype(str)
+    ).str.lower()
+    
+    # Phone coverage counted once per load for the metric card
+    df.attrs['has_phone_total'] = int((df['Phone'] != 'N/A').sum())
+    
+    return df
+
+@st.cache_data(persist="disk", show_spinner=False, hash_funcs=HASH_FUNCS)
+def load_filter_options():
+    """Load the sorted country list and the sorted cities for each country in one query"""
+    query = """
+    SELECT DISTINCT Country, City
+    FROM Customers
+    WHERE Country IS NOT NULL
+    ORDER BY Country, City
+    """
+    pairs = pd.read_sql(text(query), get_engine())
+    cities_by_country = {
+        country: group['City'].dropna().tolist()
+        for country, group in pairs.groupby('Country', sort=True)
+    }
+    return {
+        'countries': list(cities_by_country),
+        'cities': sorted(pairs['City'].dropna().unique().tolist()),
+        'cities_by_country': cities_by_country
+    }
+
+@st.cache_data(ttl=3600, show_spinner=False, hash_funcs=HASH_FUNCS)
+def compute_counts(country=None, city=None):
+    """Compute the chart value counts once per country/city filter"""
+    f = load_data(country, city)
+    return {
+        'city': f['City'].value_counts().head(10),
+        'country': f['Country'].value_counts(),
+        'title': f['ContactTitle'].value_counts().head(8),
+        'region': f['Region'].value_counts()
+    }
+
+# Figures are cached as shared objects keyed by hashable tuples, so reruns
+# from the search box or download buttons skip rebuilding the Plotly JSON
+@st.cache_resource(show_spinner=False)
+def bar_figure(names, values, title, name_label, value_label, scale, horizontal=False):
+    """Build a bar chart of counts, colored by value"""
+    if horizontal:
+        fig = px.bar(
+            x=list(values),
+            y=list(names),
+            orientation='h',
+            title=title,
+            labels={'x': value_label, 'y': name_label},
+            color=list(values),
+            color_continuous_scale=scale
+        )
+        fig.update_layout(height=400)
+    else:
+        fig = px.bar(
+            x=list(names),
+            y=list(values),
+            title=title,
+            labels={'x': name_label, 'y': value_label},
+            color=list(values),
+            color_continuous_scale=scale
+        )
+        fig.update_xaxes(tickangle=45)
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def pie_figure(names, values, title, height=None):
+    """Build a donut chart of counts"""
+    fig = px.pie(
+        values=list(values),
+        names=list(names),
+        title=title,
+        hole=0.3
+    )
+    if height:
+        fig.update_layout(height=height)
+    return fig
+
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
+def to_csv_bytes(df):
+    """Serialize customer data to CSV bytes with Arrow's C++ writer, reused across reruns"""
+    buffer = io.BytesIO()
+    pacsv.write_csv(pa.Table.from_pandas(df[CUSTOMER_COLUMNS], preserve_index=False), buffer)
+    return buffer.getvalue()
 
 def main():
     # Header
@@ -86,7 +225,11 @@ def main():
     
     # Load data
     with st.spinner("Loading data from SQL Server..."):
-        df = load_data()
+        try:
+            df = load_data()
+        except Exception as e:
+            st.error(f"Error connecting to database: {str(e)}")
+            df = None
     
     if df is None:
         st.error("Failed to load data. Please check your database connection.")
@@ -95,24 +238,32 @@ def main():
     # Sidebar for filters
     st.sidebar.header("🔍 Filters")
     
+    try:
+        options = load_filter_options()
+    except Exception as e:
+        st.error(f"Error connecting to database: {str(e)}")
+        return
+    
     # Country filter
-    countries = ['All'] + sorted(df['Country'].unique().tolist())
+    countries = ['All'] + options['countries']
     selected_country = st.sidebar.selectbox("Select Country:", countries)
+    country = None if selected_country == 'All' else selected_country
     
     # City filter (filtered based on selected country)
-    if selected_country != 'All':
-        cities = ['All'] + sorted(df[df['Country'] == selected_country]['City'].unique().tolist())
+    if country is None:
+        cities = ['All'] + options['cities']
     else:
-        cities = ['All'] + sorted(df['City'].unique().tolist())
-    
+        cities = ['All'] + options['cities_by_country'].get(country, [])
     selected_city = st.sidebar.selectbox("Select City:", cities)
+    city = None if selected_city == 'All' else selected_city
     
-    # Apply filters
-    filtered_df = df.copy()
-    if selected_country != 'All':
-        filtered_df = filtered_df[filtered_df['Country'] == selected_country]
-    if selected_city != 'All':
-        filtered_df = filtered_df[filtered_df['City'] == selected_city]
+    # Apply filters in the database query
+    with st.spinner("Loading data from SQL Server..."):
+        try:
+            filtered_df = load_data(country, city)
+        except Exception as e:
+            st.error(f"Error connecting to database: {str(e)}")
+            return
     
     # Key Metrics
     st.header("📈 Key Metrics")
@@ -147,12 +298,15 @@ def main():
         st.markdown(f"""
         <div class="metric-card">
             <h3>With Phone</h3>
-            <h2>{len(filtered_df[filtered_df['Phone'] != 'N/A']):,}</h2>
+            <h2>{filtered_df.attrs['has_phone_total']:,}</h2>
         </div>
         """, unsafe_allow_html=True)
     
     st.markdown("---")
     
+    # Chart counts, reused while only the search box changes
+    counts = compute_counts(country, city)
+    
     # Charts Section
     st.header("📊 Data Visualizations")
     
@@ -161,30 +315,22 @@ def main():
     with col1:
         st.subheader("Customers by City")
         # Bar chart for customers per city
-        city_counts = filtered_df['City'].value_counts().head(10)
-        fig_bar = px.bar(
-            x=city_counts.values,
-            y=city_counts.index,
-            orientation='h',
-            title="Top 10 Cities by Customer Count",
-            labels={'x': 'Number of Customers', 'y': 'City'},
-            color=city_counts.values,
-            color_continuous_scale='Blues'
+        city_counts = counts['city']
+        fig_bar = bar_figure(
+            tuple(city_counts.index), tuple(city_counts.values),
+            "Top 10 Cities by Customer Count", 'City', 'Number of Customers', 'Blues',
+            horizontal=True
         )
-        fig_bar.update_layout(height=400)
         st.plotly_chart(fig_bar, use_container_width=True)
     
     with col2:
         st.subheader("Customers by Country")
         # Pie chart for country distribution
-        country_counts = filtered_df['Country'].value_counts()
-        fig_pie = px.pie(
-            values=country_counts.values,
-            names=country_counts.index,
-            title="Customer Distribution by Country",
-            hole=0.3
+        country_counts = counts['country']
+        fig_pie = pie_figure(
+            tuple(country_counts.index), tuple(country_counts.values),
+            "Customer Distribution by Country", height=400
         )
-        fig_pie.update_layout(height=400)
         st.plotly_chart(fig_pie, use_container_width=True)
     
     # Additional insights
@@ -195,27 +341,20 @@ def main():
     
     with col1:
         st.subheader("Contact Titles Distribution")
-        title_counts = filtered_df['ContactTitle'].value_counts().head(8)
-        fig_title = px.bar(
-            x=title_counts.index,
-            y=title_counts.values,
-            title="Top Contact Titles",
-            labels={'x': 'Contact Title', 'y': 'Count'},
-            color=title_counts.values,
-            color_continuous_scale='Greens'
+        title_counts = counts['title']
+        fig_title = bar_figure(
+            tuple(title_counts.index), tuple(title_counts.values),
+            "Top Contact Titles", 'Contact Title', 'Count', 'Greens'
         )
-        fig_title.update_xaxes(tickangle=45)
         st.plotly_chart(fig_title, use_container_width=True)
     
     with col2:
         st.subheader("Regional Distribution")
-        region_counts = filtered_df['Region'].value_counts()
+        region_counts = counts['region']
         if len(region_counts) > 1:  # Only show if there are multiple regions
-            fig_region = px.pie(
-                values=region_counts.values,
-                names=region_counts.index,
-                title="Customer Distribution by Region",
-                hole=0.3
+            fig_region = pie_figure(
+                tuple(region_counts.index), tuple(region_counts.values),
+                "Customer Distribution by Region"
             )
             st.plotly_chart(fig_region, use_container_width=True)
         else:
@@ -229,22 +368,25 @@ def main():
     search_term = st.text_input("🔍 Search customers (by name, company, or city):", "")
     
     if search_term:
-        search_mask = (
-            filtered_df['CompanyName'].str.contains(search_term, case=False, na=False) |
-            filtered_df['ContactName'].str.contains(search_term, case=False, na=False) |
-            filtered_df['City'].str.contains(search_term, case=False, na=False)
-        )
-        display_df = filtered_df[search_mask]
+        needle = search_term.lower()
+        display_df = filtered_df[filtered_df['_search'].str.contains(needle, regex=False, na=False)]
     else:
         display_df = filtered_df
     
     # Display the table with pagination
     if len(display_df) > 0:
+        # Only the current page window is serialized to the browser
+        page_count = (len(display_df) - 1) // PAGE_SIZE + 1
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+        start = (page - 1) * PAGE_SIZE
+        page_df = display_df.iloc[start:start + PAGE_SIZE]
+        
         st.dataframe(
-            display_df,
+            page_df,
             use_container_width=True,
             hide_index=True,
             column_config={
+                "_search": None,
                 "CustomerID": st.column_config.TextColumn("Customer ID", width="medium"),
                 "CompanyName": st.column_config.TextColumn("Company Name", width="large"),
                 "ContactName": st.column_config.TextColumn("Contact Name", width="medium"),
@@ -259,7 +401,10 @@ def main():
             }
         )
         
-        st.info(f"Showing {len(display_df)} of {len(filtered_df)} customers")
+        st.info(
+            f"Showing {start + 1}-{start + len(page_df)} of {len(display_df)} matching customers "
+            f"({len(filtered_df)} in current filter), page {page} of {page_count}"
+        )
     else:
         st.warning("No customers found matching your search criteria.")
     
@@ -271,7 +416,7 @@ def main():
     
     with col1:
         # Download filtered data as CSV
-        csv_data = filtered_df.to_csv(index=False)
+        csv_data = to_csv_bytes(filtered_df)
         st.download_button(
             label="📥 Download Filtered Data (CSV)",
             data=csv_data,
@@ -282,7 +427,7 @@ def main():
     
     with col2:
         # Download all data as CSV
-        csv_all_data = df.to_csv(index=False)
+        csv_all_data = to_csv_bytes(df)
         st.download_button(
             label="📥 Download All Data (CSV)",
             data=csv_all_data,
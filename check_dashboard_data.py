@@ -7,37 +7,46 @@ import streamlit as st
 import pandas as pd
 import pyodbc
 from sqlalchemy import create_engine
+from concurrent.futures import ThreadPoolExecutor
+from config import check_driver, get_engine_url
 import warnings
 warnings.filterwarnings('ignore')
 
+# Columns the dashboard pages actually use, per table
+TABLE_COLUMNS = {
+    'Customers': ['CustomerID', 'CompanyName', 'ContactName', 'ContactTitle', 'Address',
+                  'City', 'Region', 'PostalCode', 'Country', 'Phone', 'Fax'],
+    'Orders': ['OrderID', 'CustomerID', 'EmployeeID', 'OrderDate', 'Freight', 'ShipCity', 'ShipCountry'],
+    'Products': ['ProductID', 'ProductName', 'CategoryID', 'UnitPrice', 'UnitsInStock', 'Discontinued'],
+    'Categories': ['CategoryID', 'CategoryName', 'Description'],
+    'Employees': ['EmployeeID', 'LastName', 'FirstName', 'Title', 'City', 'Country', 'ReportsTo'],
+    '[Order Details]': ['OrderID', 'ProductID', 'UnitPrice', 'Quantity', 'Discount'],
+}
+
 def check_dashboard_data():
     """Check what data the dashboard can load"""
     print("🔍 Checking Dashboard Data Loading...")
     print("=" * 60)
     
     try:
-        # SQL Server connection string (working format)
-        CONN_STR = (
-            r'DRIVER={SQL Server};'
-            r'SERVER=localhost\SQLEXPRESS;'
-            r'DATABASE=practicedatabase;'
-            r'Trusted_Connection=yes;'
-        )
+        tables = list(TABLE_COLUMNS)
         
-        # Create SQLAlchemy engine
-        engine = create_engine(f'mssql+pyodbc:///?odbc_connect={CONN_STR}')
+        check_driver()
         
-        data = {}
-        tables = ['Customers', 'Orders', 'Products', 'Categories', 'Employees', '[Order Details]']
+        # Create SQLAlchemy engine from config, with a pooled connection per table
+        engine = create_engine(get_engine_url(), pool_size=len(tables))
         
-        for table in tables:
+        # Query all tables concurrently; pyodbc releases the GIL while waiting on the server
+        with ThreadPoolExecutor(max_workers=len(tables)) as executor:
+            futures = {
+                table: executor.submit(pd.read_sql, f"SELECT {', '.join(columns)} FROM {table}", engine, dtype_backend='pyarrow')
+                for table, columns in TABLE_COLUMNS.items()
+            }
+        
+        data = {}
+        for table, future in futures.items():
             try:
-                # Handle table names with spaces
-                if table == '[Order Details]':
-                    query = "SELECT * FROM [Order Details]"
-                else:
-                    query = f"SELECT * FROM {table}"
-                df = pd.read_sql(query, engine)
+                df = future.result()
                 data[table.lower()] = df
                 print(f"✅ {table:15} | Records: {len(df):4} | Columns: {len(df.columns):2}")
                 
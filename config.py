@@ -1,9 +1,16 @@
+from urllib.parse import quote_plus
+import pyodbc
+
 # Database Configuration
 DB_CONFIG = {
-    'driver': 'SQL Server',
+    'driver': 'ODBC Driver 18 for SQL Server',
     'server': 'localhost\\SQLEXPRESS',
     'database': 'practicedatabase',
-    'trusted_connection': 'yes'
+    'trusted_connection': 'yes',
+    # Driver 18 encrypts by default; a local SQLEXPRESS instance uses a self-signed certificate
+    'encrypt': 'yes',
+    'trust_server_certificate': 'yes',
+    'mars_connection': 'yes'
 }
 
 # Build connection string
@@ -14,12 +21,29 @@ def get_connection_string():
         f"SERVER={DB_CONFIG['server']};"
         f"DATABASE={DB_CONFIG['database']};"
         f"Trusted_Connection={DB_CONFIG['trusted_connection']};"
+        f"Encrypt={DB_CONFIG['encrypt']};"
+        f"TrustServerCertificate={DB_CONFIG['trust_server_certificate']};"
+        f"MARS_Connection={DB_CONFIG['mars_connection']};"
     )
 
+# Check the ODBC driver prerequisite
+def check_driver():
+    """Raise a clear error when the configured ODBC driver is not installed"""
+    if DB_CONFIG['driver'] not in pyodbc.drivers():
+        raise RuntimeError(
+            f"ODBC driver '{DB_CONFIG['driver']}' is not installed. "
+            f"Available drivers: {', '.join(pyodbc.drivers()) or 'none'}"
+        )
+
+# Build SQLAlchemy URL
+def get_engine_url():
+    """Build the SQLAlchemy URL wrapping the ODBC connection string"""
+    return f"mssql+pyodbc:///?odbc_connect={quote_plus(get_connection_string())}"
+
 # Alternative connection string for SQL Server Authentication
 # Uncomment and modify if using SQL Server Authentication instead of Windows Authentication
 # DB_CONFIG_AUTH = {
-#     'driver': 'SQL Server',
+#     'driver': 'ODBC Driver 18 for SQL Server',
 #     'server': 'localhost\\SQLEXPRESS',
 #     'database': 'practicedatabase',
 #     'uid': 'your_username',
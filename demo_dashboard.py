@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import io
 from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
@@ -32,6 +34,11 @@ st.markdown("""
         border-left: 4px solid #1f77b4;
         margin-bottom: 1rem;
     }
+    .metric-grid {
+        display: grid;
+        grid-template-columns: repeat(4, 1fr);
+        gap: 1rem;
+    }
     .chart-container {
         background-color: white;
         padding: 1rem;
@@ -45,7 +52,13 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
+# Rows rendered per table on the All Data Tables page; downloads keep every row
+DISPLAY_LIMIT = 500
+
+# Shared across sessions as one object instead of unpickling a copy per rerun.
+# The sample data never changes, so there is no TTL; callers must treat the
+# returned dict and its DataFrames as read-only.
+@st.cache_resource
 def load_sample_data():
     """Load sample data for demonstration"""
     
@@ -64,7 +77,7 @@ def load_sample_data():
     orders_data = {
         'OrderID': [10248, 10249, 10250, 10251, 10252, 10253, 10254, 10255, 10256, 10257],
         'CustomerID': ['VINET', 'TOMSP', 'HANAR', 'VICTE', 'SUPRD', 'HANAR', 'CHOPS', 'RICSU', 'WELLI', 'HILAA'],
-        'OrderDate': ['1996-07-04', '1996-07-05', '1996-07-08', '1996-07-08', '1996-07-09', '1996-07-10', '1996-07-11', '1996-07-12', '1996-07-15', '1996-07-16'],
+        'OrderDate': np.array(['1996-07-04', '1996-07-05', '1996-07-08', '1996-07-08', '1996-07-09', '1996-07-10', '1996-07-11', '1996-07-12', '1996-07-15', '1996-07-16'], dtype='datetime64[ns]'),
         'ShipCountry': ['France', 'Germany', 'Brazil', 'France', 'Belgium', 'Brazil', 'Switzerland', 'Switzerland', 'Brazil', 'Venezuela'],
         'EmployeeID': [5, 6, 4, 3, 4, 3, 5, 9, 3, 4]
     }
@@ -111,12 +124,182 @@ def load_sample_data():
         'orderdetails': pd.DataFrame(orderdetails_data)
     }
     
-    # Convert date columns
-    data['orders']['OrderDate'] = pd.to_datetime(data['orders']['OrderDate'])
+    # Low-cardinality labels as categoricals so filters, counts and groupbys work on integer codes
+    category_columns = {
+        'customers': ('Country', 'City', 'ContactTitle'),
+        'orders': ('ShipCountry',),
+        'products': ('ProductName',),
+        'categories': ('CategoryName',),
+        'employees': ('Title', 'Country', 'City')
+    }
+    for table, columns in category_columns.items():
+        for col in columns:
+            data[table][col] = data[table][col].astype('category')
+    
+    # Sales lines enriched once here instead of on every rerun of the sales page.
+    # Each lookup is a key-indexed Series, so enrichment is a hash probe per line
+    # rather than a full merge
+    products = data['products'].set_index('ProductID')
+    category_names = data['categories'].set_index('CategoryID')['CategoryName']
+    orders = data['orders'].set_index('OrderID')
+    
+    sales = data['orderdetails'].rename(columns={'UnitPrice': 'UnitPrice_order'}).assign(
+        ProductName=lambda d: d['ProductID'].map(products['ProductName']),
+        CategoryID=lambda d: d['ProductID'].map(products['CategoryID']),
+        CategoryName=lambda d: d['CategoryID'].map(category_names),
+        OrderDate=lambda d: d['OrderID'].map(orders['OrderDate']),
+        ShipCountry=lambda d: d['OrderID'].map(orders['ShipCountry']),
+        # Revenue uses the UnitPrice from OrderDetails (UnitPrice_order)
+        Revenue=lambda d: d['UnitPrice_order'] * d['Quantity']
+    )
+    data['sales'] = sales
+    
+    # Sidebar option lists that depend only on the static sample data
+    data['options'] = {
+        'cities_by_country': {
+            country: group['City'].cat.remove_unused_categories().cat.categories.tolist()
+            for country, group in data['customers'].groupby('Country', observed=True)
+        },
+        'sales_categories': sales['CategoryName'].cat.remove_unused_categories().cat.categories.tolist()
+    }
     
     return data
 
-def customer_insights_page(data):
+def bar_chart(labels, values, title, label_title, value_title, colorscale=None, horizontal=False):
+    """Bar chart from pre-aggregated NumPy arrays, with the label axis typed as categorical"""
+    marker = {}
+    if colorscale:
+        marker = dict(color=values, colorscale=colorscale, colorbar=dict(title=value_title))
+    
+    if horizontal:
+        fig = go.Figure(go.Bar(x=values, y=labels, orientation='h', marker=marker))
+        fig.update_xaxes(title=value_title)
+        fig.update_yaxes(title=label_title, type='category')
+    else:
+        fig = go.Figure(go.Bar(x=labels, y=values, marker=marker))
+        fig.update_xaxes(title=label_title, type='category')
+        fig.update_yaxes(title=value_title)
+    fig.update_layout(title=title)
+    return fig
+
+def pie_chart(labels, values, title):
+    """Donut chart from pre-aggregated NumPy arrays"""
+    fig = go.Figure(go.Pie(labels=labels, values=values, hole=0.3))
+    fig.update_layout(title=title)
+    return fig
+
+def render_metric_cards(cards):
+    """Render (title, value) metric cards as one four-column HTML grid"""
+    cards_html = "".join(
+        f'<div class="metric-card"><h3>{title}</h3><h2>{value}</h2></div>'
+        for title, value in cards
+    )
+    st.markdown(f'<div class="metric-grid">{cards_html}</div>', unsafe_allow_html=True)
+
+def present_values(series):
+    """Sorted values of a categorical column that occur in the filtered rows"""
+    return series.cat.remove_unused_categories().cat.categories.tolist()
+
+def count_values(series):
+    """Value counts without the categories that have no rows in the filtered data"""
+    counts = series.value_counts()
+    return counts[counts > 0]
+
+def filter_customers(customers_df, country='All', city='All'):
+    """Customers in the selected country and city"""
+    filtered_customers = customers_df
+    if country != 'All':
+        filtered_customers = filtered_customers[filtered_customers['Country'] == country]
+    if city != 'All':
+        filtered_customers = filtered_customers[filtered_customers['City'] == city]
+    return filtered_customers
+
+def filter_orders(orders_df, start_date=None, end_date=None, country='All'):
+    """Orders within the date range and shipped to the selected country"""
+    filtered_orders = orders_df
+    if start_date is not None and end_date is not None:
+        # Half-open Timestamp range keeps the comparison on datetime64 values
+        lo = pd.Timestamp(start_date)
+        hi = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+        filtered_orders = filtered_orders[filtered_orders['OrderDate'].between(lo, hi, inclusive='left')]
+    if country != 'All':
+        filtered_orders = filtered_orders[filtered_orders['ShipCountry'] == country]
+    return filtered_orders
+
+def filter_sales(sales_df, category='All'):
+    """Sales lines in the selected category"""
+    if category != 'All':
+        sales_df = sales_df[sales_df['CategoryName'] == category]
+    return sales_df
+
+def filter_employees(employees_df, title='All', country='All'):
+    """Employees with the selected title and country"""
+    if title != 'All':
+        employees_df = employees_df[employees_df['Title'] == title]
+    if country != 'All':
+        employees_df = employees_df[employees_df['Country'] == country]
+    return employees_df
+
+# Chart aggregations cached per filter value, so reruns from unrelated widgets
+# reuse them; the sample data itself is shared through load_sample_data
+@st.cache_data(ttl=3600)
+def customer_aggregates(country, city):
+    """Chart counts for the filtered customers"""
+    filtered_customers = filter_customers(load_sample_data()['customers'], country, city)
+    return {
+        'country': count_values(filtered_customers['Country']),
+        'city': count_values(filtered_customers['City']).head(10),
+        'title': count_values(filtered_customers['ContactTitle']).head(8)
+    }
+
+@st.cache_data(ttl=3600)
+def order_aggregates(start_date, end_date, country):
+    """Chart data for the filtered orders"""
+    filtered_orders = filter_orders(load_sample_data()['orders'], start_date, end_date, country)
+    return {
+        'by_date': filtered_orders.groupby(filtered_orders['OrderDate'].dt.floor('D')).size().reset_index(name='count'),
+        'country': count_values(filtered_orders['ShipCountry']).head(10)
+    }
+
+@st.cache_data(ttl=3600)
+def sales_aggregates(category):
+    """Chart data for the filtered sales lines"""
+    sales_df = filter_sales(load_sample_data()['sales'], category)
+    return {
+        'category_revenue': sales_df.groupby('CategoryName', observed=True)['Revenue'].sum().sort_values(ascending=False),
+        'product_sales': sales_df.groupby('ProductName', observed=True)['Quantity'].sum().sort_values(ascending=False).head(10)
+    }
+
+@st.cache_data(ttl=3600)
+def employee_aggregates(title, country):
+    """Chart counts for the filtered employees"""
+    employees_df = filter_employees(load_sample_data()['employees'], title, country)
+    return {
+        'title': count_values(employees_df['Title']),
+        'country': count_values(employees_df['Country'])
+    }
+
+def to_csv_bytes(df):
+    """Serialize a table to CSV bytes with Arrow's C++ writer"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Write timestamps at second resolution rather than with a nanosecond fraction
+    table = table.cast(pa.schema([
+        field.with_type(pa.timestamp('s')) if pa.types.is_timestamp(field.type) else field
+        for field in table.schema
+    ]), safe=False)
+    buffer = io.BytesIO()
+    pacsv.write_csv(table, buffer)
+    return buffer.getvalue()
+
+@st.cache_data(ttl=3600)
+def build_search_index(table_name, _df):
+    """Lower-cased text of a table's string columns, one row per record, built once per table"""
+    search_text = pd.Series('', index=_df.index)
+    for col in _df.select_dtypes(include=['object', 'category']).columns:
+        search_text = search_text + '\x1f' + _df[col].astype(str)
+    return search_text.str.lower()
+
+def customer_insights_page(data, timestamp):
     """Customer Insights Dashboard"""
     st.markdown('<h1 class="main-header">👥 Customer Insights</h1>', unsafe_allow_html=True)
     
@@ -126,60 +309,30 @@ def customer_insights_page(data):
     st.sidebar.header("🔍 Customer Filters")
     
     # Country filter
-    countries = ['All'] + sorted(customers_df['Country'].unique().tolist())
+    countries = ['All'] + customers_df['Country'].cat.categories.tolist()
     selected_country = st.sidebar.selectbox("Select Country:", countries)
     
     # City filter (filtered based on selected country)
     if selected_country != 'All':
-        cities = ['All'] + sorted(customers_df[customers_df['Country'] == selected_country]['City'].unique().tolist())
+        cities = ['All'] + data['options']['cities_by_country'][selected_country]
     else:
-        cities = ['All'] + sorted(customers_df['City'].unique().tolist())
+        cities = ['All'] + customers_df['City'].cat.categories.tolist()
     
     selected_city = st.sidebar.selectbox("Select City:", cities)
     
     # Apply filters
-    filtered_customers = customers_df.copy()
-    if selected_country != 'All':
-        filtered_customers = filtered_customers[filtered_customers['Country'] == selected_country]
-    if selected_city != 'All':
-        filtered_customers = filtered_customers[filtered_customers['City'] == selected_city]
+    filtered_customers = filter_customers(customers_df, selected_country, selected_city)
+    aggregates = customer_aggregates(selected_country, selected_city)
     
     # Key Metrics
     st.header("📈 Key Metrics")
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Total Customers</h3>
-            <h2>{len(filtered_customers):,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Unique Cities</h3>
-            <h2>{filtered_customers['City'].nunique():,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Unique Countries</h3>
-            <h2>{filtered_customers['Country'].nunique():,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Contact Titles</h3>
-            <h2>{filtered_customers['ContactTitle'].nunique():,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
+    render_metric_cards([
+        ("Total Customers", f"{len(filtered_customers):,}"),
+        ("Unique Cities", f"{filtered_customers['City'].nunique():,}"),
+        ("Unique Countries", f"{filtered_customers['Country'].nunique():,}"),
+        ("Contact Titles", f"{filtered_customers['ContactTitle'].nunique():,}")
+    ])
     
     st.markdown("---")
     
@@ -190,53 +343,38 @@ def customer_insights_page(data):
     
     with col1:
         st.subheader("Customers by Country")
-        country_counts = filtered_customers['Country'].value_counts()
-        fig_country = px.pie(
-            values=country_counts.values,
-            names=country_counts.index,
-            title="Customer Distribution by Country",
-            hole=0.3
+        country_counts = aggregates['country']
+        fig_country = pie_chart(
+            country_counts.index.to_numpy(),
+            country_counts.to_numpy(),
+            "Customer Distribution by Country"
         )
         fig_country.update_layout(height=400)
         st.plotly_chart(fig_country, use_container_width=True)
     
     with col2:
         st.subheader("Top Cities by Customer Count")
-        city_counts = filtered_customers['City'].value_counts().head(10)
-        # Create DataFrame for plotting
-        city_df = pd.DataFrame({
-            'City': city_counts.index,
-            'Count': city_counts.values
-        })
-        fig_city = px.bar(
-            city_df,
-            x='Count',
-            y='City',
-            orientation='h',
-            title="Top Cities by Customer Count",
-            labels={'Count': 'Number of Customers', 'City': 'City'},
-            color='Count',
-            color_continuous_scale='Blues'
+        city_counts = aggregates['city']
+        fig_city = bar_chart(
+            city_counts.index.to_numpy(),
+            city_counts.to_numpy(),
+            "Top Cities by Customer Count",
+            'City', 'Number of Customers',
+            colorscale='Blues',
+            horizontal=True
         )
         fig_city.update_layout(height=400)
         st.plotly_chart(fig_city, use_container_width=True)
     
     # Contact Titles Distribution
     st.subheader("Contact Titles Distribution")
-    title_counts = filtered_customers['ContactTitle'].value_counts().head(8)
-    # Create DataFrame for plotting
-    title_df = pd.DataFrame({
-        'Title': title_counts.index,
-        'Count': title_counts.values
-    })
-    fig_title = px.bar(
-        title_df,
-        x='Title',
-        y='Count',
-        title="Top Contact Titles",
-        labels={'Title': 'Contact Title', 'Count': 'Count'},
-        color='Count',
-        color_continuous_scale='Greens'
+    title_counts = aggregates['title']
+    fig_title = bar_chart(
+        title_counts.index.to_numpy(),
+        title_counts.to_numpy(),
+        "Top Contact Titles",
+        'Contact Title', 'Count',
+        colorscale='Greens'
     )
     fig_title.update_xaxes(tickangle=45)
     st.plotly_chart(fig_title, use_container_width=True)
@@ -245,15 +383,15 @@ def customer_insights_page(data):
     st.markdown("---")
     st.header("💾 Export Customer Data")
     
-    csv_data = filtered_customers.to_csv(index=False)
+    csv_data = to_csv_bytes(filtered_customers)
     st.download_button(
         label="📥 Download Customer Data (CSV)",
         data=csv_data,
-        file_name=f"customer_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        file_name=f"customer_data_{timestamp}.csv",
         mime="text/csv"
     )
 
-def orders_overview_page(data):
+def orders_overview_page(data, timestamp):
     """Orders Overview Dashboard"""
     st.markdown('<h1 class="main-header">📦 Orders Overview</h1>', unsafe_allow_html=True)
     
@@ -275,59 +413,31 @@ def orders_overview_page(data):
     
     if len(date_range) == 2:
         start_date, end_date = date_range
-        filtered_orders = orders_df[
-            (orders_df['OrderDate'].dt.date >= start_date) &
-            (orders_df['OrderDate'].dt.date <= end_date)
-        ]
     else:
-        filtered_orders = orders_df
+        start_date, end_date = None, None
+    filtered_orders = filter_orders(orders_df, start_date, end_date)
     
     # Country filter
-    countries = ['All'] + sorted(filtered_orders['ShipCountry'].unique().tolist())
+    countries = ['All'] + present_values(filtered_orders['ShipCountry'])
     selected_country = st.sidebar.selectbox("Ship Country:", countries)
     
-    if selected_country != 'All':
-        filtered_orders = filtered_orders[filtered_orders['ShipCountry'] == selected_country]
+    filtered_orders = filter_orders(filtered_orders, country=selected_country)
+    aggregates = order_aggregates(start_date, end_date, selected_country)
     
     # Key Metrics
     st.header("📈 Order Metrics")
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Total Orders</h3>
-            <h2>{len(filtered_orders):,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        recent_orders = len(filtered_orders[filtered_orders['OrderDate'] >= (datetime.now() - timedelta(days=30))])
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Recent Orders (30d)</h3>
-            <h2>{recent_orders:,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        unique_customers = filtered_orders['CustomerID'].nunique()
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Unique Customers</h3>
-            <h2>{unique_customers:,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        unique_countries = filtered_orders['ShipCountry'].nunique()
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Ship Countries</h3>
-            <h2>{unique_countries:,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
+    # Count straight off the datetime64 values without slicing the frame
+    cutoff = np.datetime64(datetime.now() - timedelta(days=30), 'ns')
+    recent_orders = int((filtered_orders['OrderDate'].to_numpy() >= cutoff).sum())
+    unique_customers = filtered_orders['CustomerID'].nunique()
+    unique_countries = filtered_orders['ShipCountry'].nunique()
+    render_metric_cards([
+        ("Total Orders", f"{len(filtered_orders):,}"),
+        ("Recent Orders (30d)", f"{recent_orders:,}"),
+        ("Unique Customers", f"{unique_customers:,}"),
+        ("Ship Countries", f"{unique_countries:,}")
+    ])
     
     st.markdown("---")
     
@@ -338,25 +448,28 @@ def orders_overview_page(data):
     
     with col1:
         st.subheader("Orders Over Time")
-        orders_by_date = filtered_orders.groupby(filtered_orders['OrderDate'].dt.date).size().reset_index(name='count')
-        fig_time = px.line(
-            x=orders_by_date['OrderDate'],
-            y=orders_by_date['count'],
+        orders_by_date = aggregates['by_date']
+        fig_time = go.Figure(go.Scatter(
+            x=orders_by_date['OrderDate'].to_numpy(),
+            y=orders_by_date['count'].to_numpy(),
+            mode='lines'
+        ))
+        fig_time.update_layout(
             title="Orders Over Time",
-            labels={'x': 'Date', 'y': 'Number of Orders'}
+            xaxis_title='Date',
+            yaxis_title='Number of Orders'
         )
         fig_time.update_layout(height=400)
         st.plotly_chart(fig_time, use_container_width=True)
     
     with col2:
         st.subheader("Orders by Country")
-        country_counts = filtered_orders['ShipCountry'].value_counts().head(10)
-        fig_country = px.bar(
-            x=country_counts.index,
-            y=country_counts.values,
-            title="Top Countries by Orders",
-            labels={'x': 'Country', 'y': 'Number of Orders'},
-            color_continuous_scale='Reds'
+        country_counts = aggregates['country']
+        fig_country = bar_chart(
+            country_counts.index.to_numpy(),
+            country_counts.to_numpy(),
+            "Top Countries by Orders",
+            'Country', 'Number of Orders'
         )
         fig_country.update_xaxes(tickangle=45)
         fig_country.update_layout(height=400)
@@ -366,102 +479,44 @@ def orders_overview_page(data):
     st.markdown("---")
     st.header("💾 Export Order Data")
     
-    csv_data = filtered_orders.to_csv(index=False)
+    csv_data = to_csv_bytes(filtered_orders)
     st.download_button(
         label="📥 Download Order Data (CSV)",
         data=csv_data,
-        file_name=f"order_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        file_name=f"order_data_{timestamp}.csv",
         mime="text/csv"
     )
 
-def sales_products_page(data):
+def sales_products_page(data, timestamp):
     """Sales & Products Dashboard"""
     st.markdown('<h1 class="main-header">💰 Sales & Products</h1>', unsafe_allow_html=True)
     
-    # Create sales data by joining tables
-    sales_df = data['orderdetails'].merge(
-        data['products'], 
-        left_on='ProductID', 
-        right_on='ProductID', 
-        how='left',
-        suffixes=('_order', '_product')
-    )
-    
-    # Join with Categories
-    sales_df = sales_df.merge(
-        data['categories'],
-        left_on='CategoryID',
-        right_on='CategoryID',
-        how='left'
-    )
-    
-    # Calculate revenue - use the UnitPrice from OrderDetails (UnitPrice_order)
-    if 'UnitPrice_order' in sales_df.columns and 'Quantity' in sales_df.columns:
-        sales_df['Revenue'] = sales_df['UnitPrice_order'] * sales_df['Quantity']
-    elif 'UnitPrice' in sales_df.columns and 'Quantity' in sales_df.columns:
-        sales_df['Revenue'] = sales_df['UnitPrice'] * sales_df['Quantity']
-    else:
-        st.error("Required columns for revenue calculation not found")
-        return
-    
-    # Join with Orders for date information
-    sales_df = sales_df.merge(
-        data['orders'][['OrderID', 'OrderDate', 'ShipCountry']],
-        left_on='OrderID',
-        right_on='OrderID',
-        how='left'
-    )
+    # Sales data joined once in load_sample_data
+    sales_df = data['sales']
     
     # Sidebar filters
     st.sidebar.header("🔍 Sales Filters")
     
     # Category filter
-    categories = ['All'] + sorted(sales_df['CategoryName'].unique().tolist())
+    categories = ['All'] + data['options']['sales_categories']
     selected_category = st.sidebar.selectbox("Select Category:", categories)
     
-    if selected_category != 'All':
-        sales_df = sales_df[sales_df['CategoryName'] == selected_category]
+    sales_df = filter_sales(sales_df, selected_category)
+    aggregates = sales_aggregates(selected_category)
     
     # Key Metrics
     st.header("📈 Sales Metrics")
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        total_revenue = sales_df['Revenue'].sum()
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Total Revenue</h3>
-            <h2>${total_revenue:,.2f}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        total_orders = sales_df['OrderID'].nunique()
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Total Orders</h3>
-            <h2>{total_orders:,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        total_products = sales_df['ProductID'].nunique()
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Products Sold</h3>
-            <h2>{total_products:,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Avg Order Value</h3>
-            <h2>${avg_order_value:,.2f}</h2>
-        </div>
-        """, unsafe_allow_html=True)
+    total_revenue = sales_df['Revenue'].sum()
+    total_orders = sales_df['OrderID'].nunique()
+    total_products = sales_df['ProductID'].nunique()
+    avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
+    render_metric_cards([
+        ("Total Revenue", f"${total_revenue:,.2f}"),
+        ("Total Orders", f"{total_orders:,}"),
+        ("Products Sold", f"{total_products:,}"),
+        ("Avg Order Value", f"${avg_order_value:,.2f}")
+    ])
     
     st.markdown("---")
     
@@ -472,33 +527,25 @@ def sales_products_page(data):
     
     with col1:
         st.subheader("Revenue by Category")
-        category_revenue = sales_df.groupby('CategoryName')['Revenue'].sum().sort_values(ascending=False)
-        fig_category = px.pie(
-            values=category_revenue.values,
-            names=category_revenue.index,
-            title="Revenue Distribution by Category",
-            hole=0.3
+        category_revenue = aggregates['category_revenue']
+        fig_category = pie_chart(
+            category_revenue.index.to_numpy(),
+            category_revenue.to_numpy(),
+            "Revenue Distribution by Category"
         )
         fig_category.update_layout(height=400)
         st.plotly_chart(fig_category, use_container_width=True)
     
     with col2:
         st.subheader("Best Selling Products")
-        product_sales = sales_df.groupby('ProductName')['Quantity'].sum().sort_values(ascending=False).head(10)
-        # Create DataFrame for plotting
-        product_df = pd.DataFrame({
-            'Product': product_sales.index,
-            'Quantity': product_sales.values
-        })
-        fig_products = px.bar(
-            product_df,
-            x='Quantity',
-            y='Product',
-            orientation='h',
-            title="Top 10 Products by Quantity Sold",
-            labels={'Quantity': 'Quantity Sold', 'Product': 'Product'},
-            color='Quantity',
-            color_continuous_scale='Greens'
+        product_sales = aggregates['product_sales']
+        fig_products = bar_chart(
+            product_sales.index.to_numpy(),
+            product_sales.to_numpy(),
+            "Top 10 Products by Quantity Sold",
+            'Product', 'Quantity Sold',
+            colorscale='Greens',
+            horizontal=True
         )
         fig_products.update_layout(height=400)
         st.plotly_chart(fig_products, use_container_width=True)
@@ -507,15 +554,15 @@ def sales_products_page(data):
     st.markdown("---")
     st.header("💾 Export Sales Data")
     
-    csv_data = sales_df.to_csv(index=False)
+    csv_data = to_csv_bytes(sales_df)
     st.download_button(
         label="📥 Download Sales Data (CSV)",
         data=csv_data,
-        file_name=f"sales_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        file_name=f"sales_data_{timestamp}.csv",
         mime="text/csv"
     )
 
-def employees_page(data):
+def employees_page(data, timestamp):
     """Employees Dashboard"""
     st.markdown('<h1 class="main-header">👨‍💼 Employee Analytics</h1>', unsafe_allow_html=True)
     
@@ -525,58 +572,30 @@ def employees_page(data):
     st.sidebar.header("🔍 Employee Filters")
     
     # Title filter
-    titles = ['All'] + sorted(employees_df['Title'].unique().tolist())
+    titles = ['All'] + employees_df['Title'].cat.categories.tolist()
     selected_title = st.sidebar.selectbox("Select Title:", titles)
     
-    if selected_title != 'All':
-        employees_df = employees_df[employees_df['Title'] == selected_title]
+    employees_df = filter_employees(employees_df, title=selected_title)
     
     # Country filter
-    countries = ['All'] + sorted(employees_df['Country'].unique().tolist())
+    countries = ['All'] + present_values(employees_df['Country'])
     selected_country = st.sidebar.selectbox("Select Country:", countries)
     
-    if selected_country != 'All':
-        employees_df = employees_df[employees_df['Country'] == selected_country]
+    employees_df = filter_employees(employees_df, country=selected_country)
+    aggregates = employee_aggregates(selected_title, selected_country)
     
     # Key Metrics
     st.header("📈 Employee Metrics")
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Total Employees</h3>
-            <h2>{len(employees_df):,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        unique_titles = employees_df['Title'].nunique()
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Job Titles</h3>
-            <h2>{unique_titles:,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        unique_countries = employees_df['Country'].nunique()
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Countries</h3>
-            <h2>{unique_countries:,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        unique_cities = employees_df['City'].nunique()
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Cities</h3>
-            <h2>{unique_cities:,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
+    unique_titles = employees_df['Title'].nunique()
+    unique_countries = employees_df['Country'].nunique()
+    unique_cities = employees_df['City'].nunique()
+    render_metric_cards([
+        ("Total Employees", f"{len(employees_df):,}"),
+        ("Job Titles", f"{unique_titles:,}"),
+        ("Countries", f"{unique_countries:,}"),
+        ("Cities", f"{unique_cities:,}")
+    ])
     
     st.markdown("---")
     
@@ -587,32 +606,24 @@ def employees_page(data):
     
     with col1:
         st.subheader("Employees by Title")
-        title_counts = employees_df['Title'].value_counts()
-        fig_title = px.pie(
-            values=title_counts.values,
-            names=title_counts.index,
-            title="Employee Distribution by Title",
-            hole=0.3
+        title_counts = aggregates['title']
+        fig_title = pie_chart(
+            title_counts.index.to_numpy(),
+            title_counts.to_numpy(),
+            "Employee Distribution by Title"
         )
         fig_title.update_layout(height=400)
         st.plotly_chart(fig_title, use_container_width=True)
     
     with col2:
         st.subheader("Employees by Country")
-        country_counts = employees_df['Country'].value_counts()
-        # Create DataFrame for plotting
-        country_df = pd.DataFrame({
-            'Country': country_counts.index,
-            'Count': country_counts.values
-        })
-        fig_country = px.bar(
-            country_df,
-            x='Country',
-            y='Count',
-            title="Employees by Country",
-            labels={'Country': 'Country', 'Count': 'Number of Employees'},
-            color='Count',
-            color_continuous_scale='Blues'
+        country_counts = aggregates['country']
+        fig_country = bar_chart(
+            country_counts.index.to_numpy(),
+            country_counts.to_numpy(),
+            "Employees by Country",
+            'Country', 'Number of Employees',
+            colorscale='Blues'
         )
         fig_country.update_xaxes(tickangle=45)
         fig_country.update_layout(height=400)
@@ -622,15 +633,15 @@ def employees_page(data):
     st.markdown("---")
     st.header("💾 Export Employee Data")
     
-    csv_data = employees_df.to_csv(index=False)
+    csv_data = to_csv_bytes(employees_df)
     st.download_button(
         label="📥 Download Employee Data (CSV)",
         data=csv_data,
-        file_name=f"employee_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        file_name=f"employee_data_{timestamp}.csv",
         mime="text/csv"
     )
 
-def all_data_tables_page(data):
+def all_data_tables_page(data, timestamp):
     """All Data Tables Page"""
     st.markdown('<h1 class="main-header">📋 All Data Tables</h1>', unsafe_allow_html=True)
     
@@ -658,29 +669,37 @@ def all_data_tables_page(data):
             search_term = st.text_input(f"🔍 Search in {table_name}:", key=f"search_{table_name}")
             
             if search_term:
-                # Search in all string columns
-                search_mask = pd.DataFrame([df[col].astype(str).str.contains(search_term, case=False, na=False) 
-                                          for col in df.select_dtypes(include=['object']).columns]).any()
-                display_df = df[search_mask]
+                # Search in all string columns through the cached per-table index
+                search_index = build_search_index(table_name, df)
+                display_df = df[search_index.str.contains(search_term.lower(), regex=False, na=False)]
             else:
                 display_df = df
             
-            # Display the table
+            # Display the table, capped so the browser payload stays bounded
+            st.caption(f"Showing first {min(DISPLAY_LIMIT, len(display_df)):,} of {len(display_df):,} rows")
             st.dataframe(
-                display_df,
+                display_df.head(DISPLAY_LIMIT),
                 use_container_width=True,
                 hide_index=True
             )
             
-            # Download button for this table
-            csv_data = display_df.to_csv(index=False)
-            st.download_button(
-                label=f"📥 Download {table_name} Data (CSV)",
-                data=csv_data,
-                file_name=f"{table_name.lower()}_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv",
-                key=f"download_{table_name}"
-            )
+            # Download button for this table; the CSV is only built on request and
+            # kept in session state until the search term changes
+            csv_key = f"csv_{table_name}"
+            if csv_key in st.session_state and st.session_state[csv_key][0] != search_term:
+                del st.session_state[csv_key]
+            
+            if st.button(f"📄 Prepare {table_name} CSV", key=f"prepare_{table_name}"):
+                st.session_state[csv_key] = (search_term, to_csv_bytes(display_df))
+            
+            if csv_key in st.session_state:
+                st.download_button(
+                    label=f"📥 Download {table_name} Data (CSV)",
+                    data=st.session_state[csv_key][1],
+                    file_name=f"{table_name.lower()}_data_{timestamp}.csv",
+                    mime="text/csv",
+                    key=f"download_{table_name}"
+                )
 
 def main():
     # Load sample data
@@ -690,6 +709,10 @@ def main():
     # Add a notice about demo data
     st.info("🎯 **Demo Mode**: This dashboard is running with sample data. The actual multi-page dashboard connects to your SQL Server database.")
     
+    # One clock read per run, shared by every download file name and the footer
+    now = datetime.now()
+    timestamp = now.strftime('%Y%m%d_%H%M%S')
+    
     # Sidebar navigation
     st.sidebar.title("📊 Dashboard Navigation")
     
@@ -700,15 +723,15 @@ def main():
     
     # Display selected page
     if page == "Customer Insights":
-        customer_insights_page(data)
+        customer_insights_page(data, timestamp)
     elif page == "Orders Overview":
-        orders_overview_page(data)
+        orders_overview_page(data, timestamp)
     elif page == "Sales & Products":
-        sales_products_page(data)
+        sales_products_page(data, timestamp)
     elif page == "Employees":
-        employees_page(data)
+        employees_page(data, timestamp)
     elif page == "All Data Tables":
-        all_data_tables_page(data)
+        all_data_tables_page(data, timestamp)
     
     # Footer
     st.markdown("---")
@@ -718,7 +741,7 @@ def main():
             <p>📊 Business Analytics Dashboard - Demo | Powered by Streamlit</p>
             <p>Data last updated: {}</p>
         </div>
-        """.format(datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        """.format(now.strftime("%Y-%m-%d %H:%M:%S")),
         unsafe_allow_html=True
     )
 
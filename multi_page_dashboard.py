@@ -3,9 +3,16 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import pyodbc
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import io
+import html
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from config import check_driver, get_engine_url
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -109,115 +116,616 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
+# Columns sent to the browser when a relationship view displays these records;
+# the full rows remain available through the CSV exports
+DISPLAY_COLUMNS = {
+    'employees': ['EmployeeID', 'FirstName', 'LastName', 'Title', 'City', 'Country'],
+    'comprehensive': [
+        'OrderID', 'OrderDate', 'ShippedDate', 'CustomerID', 'CustomerCompany', 'FirstName', 'LastName',
+        'ProductID', 'ProductName', 'CategoryName', 'UnitPrice', 'Quantity', 'Discount', 'Revenue', 'ShipCountry'
+    ]
+}
+
+# Tables behind the Data Relationships sidebar dropdowns
+RELATIONSHIP_FILTER_KINDS = ('orders', 'customers', 'employees', 'products', 'categories')
+
+@st.cache_resource
+def get_engine():
+    """Create the SQLAlchemy engine once and share its connection pool across sessions"""
+    check_driver()
+    engine = create_engine(
+        get_engine_url(),
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=5,
+        fast_executemany=True
+    )
+    
+    # Fetch rows in large batches instead of the DB-API default of one row per fetchmany()
+    @event.listens_for(engine, "before_cursor_execute")
+    def set_cursor_arraysize(conn, cursor, statement, parameters, context, executemany):
+        cursor.arraysize = 1000
+    
+    return engine
+
+class TableLoadError(Exception):
+    """Raised by load_all_data when some tables fail to load. Carries one message per
+    failed table and the partial data, with an empty frame for each failed table"""
+    def __init__(self, failures, data):
+        super().__init__("; ".join(failures))
+        self.failures = failures
+        self.data = data
+
+# Persisted to disk so app restarts reload the pickled tables instead of
+# re-querying SQL Server. Streamlit ignores ttl for persisted caches, so the
+# tables stay cached until the sidebar's Refresh data button (or `streamlit
+# cache clear`) drops them. Connection errors and partial loads are raised
+# rather than returned, so only a complete load ever ends up in the cache.
+@st.cache_data(persist="disk", show_spinner=False, max_entries=2)
 def load_all_data():
     """Load all data from SQL Server database"""
+    # Reuse the shared SQLAlchemy engine
+    engine = get_engine()
+    
+    # Each query selects only the columns the pages read, which keeps the
+    # Employees Photo/Notes and Categories Picture blobs off the wire
+    queries = {
+        'customers': """
+        SELECT CustomerID, CompanyName, ContactName, ContactTitle, City, Country, Phone
+        FROM Customers
+        """,
+        'orders': """
+        SELECT OrderID, CustomerID, EmployeeID, OrderDate, RequiredDate, ShippedDate,
+               Freight, ShipName, ShipCity, ShipCountry
+        FROM Orders
+        """,
+        'products': """
+        SELECT ProductID, ProductName, CategoryID, UnitPrice, UnitsInStock, Discontinued
+        FROM Products
+        """,
+        'categories': """
+        SELECT CategoryID, CategoryName
+        FROM Categories
+        """,
+        'employees': """
+        SELECT EmployeeID, FirstName, LastName, Title, City, Country, BirthDate, HireDate, ReportsTo
+        FROM Employees
+        """,
+        'orderdetails': """
+        SELECT OrderID, ProductID, UnitPrice, Quantity, Discount
+        FROM [Order Details]
+        """,
+        'sales': """
+        SELECT 
+            od.OrderID,
+            od.ProductID,
+            od.UnitPrice,
+            od.Quantity,
+            od.Discount,
+            od.UnitPrice * od.Quantity AS Revenue,
+            p.ProductName,
+            c.CategoryName,
+            o.OrderDate,
+            o.ShipCountry
+        FROM [Order Details] od
+        LEFT JOIN Products p ON od.ProductID = p.ProductID
+        LEFT JOIN Categories c ON p.CategoryID = c.CategoryID
+        LEFT JOIN Orders o ON od.OrderID = o.OrderID
+        """,
+        'comprehensive': """
+        SELECT 
+            o.OrderID,
+            od.ProductID,
+            od.UnitPrice,
+            od.Quantity,
+            od.Discount,
+            o.CustomerID,
+            o.EmployeeID,
+            o.OrderDate,
+            o.RequiredDate,
+            o.ShippedDate,
+            o.Freight,
+            o.ShipName,
+            o.ShipCity,
+            o.ShipCountry,
+            p.ProductName,
+            p.CategoryID,
+            p.UnitPrice AS ListPrice,
+            p.UnitsInStock,
+            p.Discontinued,
+            c.CompanyName AS CustomerCompany,
+            c.ContactName,
+            c.ContactTitle,
+            c.City AS CustomerCity,
+            c.Country AS CustomerCountry,
+            c.Phone,
+            cat.CategoryName,
+            e.FirstName,
+            e.LastName,
+            e.Title,
+            e.City AS EmployeeCity,
+            e.Country AS EmployeeCountry,
+            e.BirthDate,
+            e.HireDate,
+            e.ReportsTo,
+            od.UnitPrice * od.Quantity AS Revenue
+        FROM [Order Details] od
+        RIGHT JOIN Orders o ON od.OrderID = o.OrderID
+        LEFT JOIN Products p ON od.ProductID = p.ProductID
+        INNER JOIN Customers c ON o.CustomerID = c.CustomerID
+        INNER JOIN Categories cat ON p.CategoryID = cat.CategoryID
+        INNER JOIN Employees e ON o.EmployeeID = e.EmployeeID
+        ORDER BY o.OrderID, od.ProductID
+        """
+    }
+    
+    # The queries are independent, so run them concurrently on pooled
+    # connections; each table's result (or error) is handled below
+    with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+        futures = {name: executor.submit(pd.read_sql, query, engine) for name, query in queries.items()}
+    
+    # Missing text values are left as NaN rather than an 'N/A' sentinel so the
+    # pages can use notna()/count() and st.dataframe renders them as empty cells
+    data = {}
+    failures = []
+    
+    # Load Customers
     try:
-        # SQL Server connection string (working format)
-        CONN_STR = (
-            r'DRIVER={SQL Server};'
-            r'SERVER=localhost\SQLEXPRESS;'
-            r'DATABASE=practicedatabase;'
-            r'Trusted_Connection=yes;'
-        )
-        
-        # Create SQLAlchemy engine
-        engine = create_engine(f'mssql+pyodbc:///?odbc_connect={CONN_STR}')
-        
-        data = {}
-        
-        # Load Customers
-        try:
-            customers_query = "SELECT * FROM Customers"
-            data['customers'] = pd.read_sql(customers_query, engine)
-            # Handle NaN values properly for string columns
-            string_columns = data['customers'].select_dtypes(include=['object']).columns
-            data['customers'][string_columns] = data['customers'][string_columns].fillna('N/A')
-        except Exception as e:
-            st.warning(f"Could not load Customers table: {str(e)}")
-            data['customers'] = pd.DataFrame()
-        
-        # Load Orders
-        try:
-            orders_query = "SELECT * FROM Orders"
-            data['orders'] = pd.read_sql(orders_query, engine)
-            # Handle date columns properly
-            date_columns = ['OrderDate', 'RequiredDate', 'ShippedDate']
-            for col in date_columns:
-                if col in data['orders'].columns:
-                    data['orders'][col] = pd.to_datetime(data['orders'][col], errors='coerce')
-            
-            # Handle string columns
-            string_columns = data['orders'].select_dtypes(include=['object']).columns
-            data['orders'][string_columns] = data['orders'][string_columns].fillna('N/A')
-        except Exception as e:
-            st.warning(f"Could not load Orders table: {str(e)}")
-            data['orders'] = pd.DataFrame()
-        
-        # Load Products
-        try:
-            products_query = "SELECT * FROM Products"
-            data['products'] = pd.read_sql(products_query, engine)
-            # Handle numeric columns properly
-            numeric_columns = data['products'].select_dtypes(include=[np.number]).columns
-            data['products'][numeric_columns] = data['products'][numeric_columns].fillna(0)
-            
-            # Handle string columns
-            string_columns = data['products'].select_dtypes(include=['object']).columns
-            data['products'][string_columns] = data['products'][string_columns].fillna('N/A')
-        except Exception as e:
-            st.warning(f"Could not load Products table: {str(e)}")
-            data['products'] = pd.DataFrame()
-        
-        # Load Categories
-        try:
-            categories_query = "SELECT * FROM Categories"
-            data['categories'] = pd.read_sql(categories_query, engine)
-            # Handle string columns
-            string_columns = data['categories'].select_dtypes(include=['object']).columns
-            data['categories'][string_columns] = data['categories'][string_columns].fillna('N/A')
-        except Exception as e:
-            st.warning(f"Could not load Categories table: {str(e)}")
-            data['categories'] = pd.DataFrame()
-        
-        # Load Employees
-        try:
-            employees_query = "SELECT * FROM Employees"
-            data['employees'] = pd.read_sql(employees_query, engine)
-            # Handle ReportsTo column properly (it's numeric but can be null)
-            if 'ReportsTo' in data['employees'].columns:
-                data['employees']['ReportsTo'] = pd.to_numeric(data['employees']['ReportsTo'], errors='coerce')
-                data['employees']['ReportsTo'] = data['employees']['ReportsTo'].fillna(0).astype(int)
-            
-            # Handle date columns
-            date_columns = ['BirthDate', 'HireDate']
-            for col in date_columns:
-                if col in data['employees'].columns:
-                    data['employees'][col] = pd.to_datetime(data['employees'][col], errors='coerce')
-            
-            # Handle string columns
-            string_columns = data['employees'].select_dtypes(include=['object']).columns
-            data['employees'][string_columns] = data['employees'][string_columns].fillna('N/A')
-        except Exception as e:
-            st.warning(f"Could not load Employees table: {str(e)}")
-            data['employees'] = pd.DataFrame()
-        
-        # Load Order Details (table name has a space)
-        try:
-            orderdetails_query = "SELECT * FROM [Order Details]"
-            data['orderdetails'] = pd.read_sql(orderdetails_query, engine)
-            # Handle numeric columns properly
-            numeric_columns = data['orderdetails'].select_dtypes(include=[np.number]).columns
-            data['orderdetails'][numeric_columns] = data['orderdetails'][numeric_columns].fillna(0)
-        except Exception as e:
-            st.warning(f"Could not load Order Details table: {str(e)}")
-            data['orderdetails'] = pd.DataFrame()
+        data['customers'] = futures['customers'].result()
+    except Exception as e:
+        failures.append(f"Could not load Customers table: {str(e)}")
+        data['customers'] = pd.DataFrame()
+    
+    # Load Orders
+    try:
+        # Date columns normally arrive as datetime64 since pyodbc returns typed
+        # datetime values; OrderDate is coerced here once so no page has to parse it
+        data['orders'] = futures['orders'].result()
+        data['orders']['OrderDate'] = pd.to_datetime(data['orders']['OrderDate'], errors='coerce')
+    except Exception as e:
+        failures.append(f"Could not load Orders table: {str(e)}")
+        data['orders'] = pd.DataFrame()
+    
+    # Load Products
+    try:
+        data['products'] = futures['products'].result()
+        # Handle numeric columns properly
+        numeric_columns = data['products'].select_dtypes(include=[np.number]).columns
+        data['products'][numeric_columns] = data['products'][numeric_columns].fillna(0)
+    except Exception as e:
+        failures.append(f"Could not load Products table: {str(e)}")
+        data['products'] = pd.DataFrame()
+    
+    # Load Categories
+    try:
+        data['categories'] = futures['categories'].result()
+    except Exception as e:
+        failures.append(f"Could not load Categories table: {str(e)}")
+        data['categories'] = pd.DataFrame()
+    
+    # Load Employees
+    try:
+        data['employees'] = futures['employees'].result()
+        # Handle ReportsTo column properly (it's numeric but can be null)
+        if 'ReportsTo' in data['employees'].columns:
+            data['employees']['ReportsTo'] = data['employees']['ReportsTo'].fillna(0).astype(int)
         
-        return data
+        # Display name used by the charts and dropdowns, built once per load
+        data['employees']['FullName'] = data['employees']['FirstName'].str.cat(data['employees']['LastName'], sep=' ').astype('category')
+    except Exception as e:
+        failures.append(f"Could not load Employees table: {str(e)}")
+        data['employees'] = pd.DataFrame()
+    
+    # Load Order Details (table name has a space)
+    try:
+        data['orderdetails'] = futures['orderdetails'].result()
+        # Handle numeric columns properly
+        numeric_columns = data['orderdetails'].select_dtypes(include=[np.number]).columns
+        data['orderdetails'][numeric_columns] = data['orderdetails'][numeric_columns].fillna(0)
+        # Line revenue is derived once here rather than in every drilldown that sums it
+        data['orderdetails']['LineRevenue'] = data['orderdetails']['UnitPrice'].to_numpy() * data['orderdetails']['Quantity'].to_numpy()
+    except Exception as e:
+        failures.append(f"Could not load Order Details table: {str(e)}")
+        data['orderdetails'] = pd.DataFrame()
+    
+    # Load sales lines joined and priced on the server for the Sales & Products page
+    try:
+        data['sales'] = futures['sales'].result()
+    except Exception as e:
+        failures.append(f"Could not load sales data: {str(e)}")
+        data['sales'] = pd.DataFrame()
     
+    # Load the Data Relationships dataset, joined across all six tables on the server
+    try:
+        data['comprehensive'] = futures['comprehensive'].result()
+        data['comprehensive']['OrderDate'] = pd.to_datetime(data['comprehensive']['OrderDate'], errors='coerce')
+        if 'ReportsTo' in data['comprehensive'].columns:
+            data['comprehensive']['ReportsTo'] = data['comprehensive']['ReportsTo'].fillna(0).astype(int)
     except Exception as e:
-        st.error(f"Error connecting to database: {str(e)}")
-        return None
+        failures.append(f"Could not load relationship data: {str(e)}")
+        data['comprehensive'] = pd.DataFrame()
+    
+    # Key columns are normalized once per load so the relationship views' equality
+    # masks compare compact codes: integer ids as int32 and the text CustomerID as
+    # a categorical. Columns holding NULLs keep their float dtype
+    key_columns = {
+        'customers': ('CustomerID',),
+        'orders': ('OrderID', 'CustomerID', 'EmployeeID'),
+        'products': ('ProductID', 'CategoryID'),
+        'categories': ('CategoryID',),
+        'employees': ('EmployeeID',),
+        'orderdetails': ('OrderID', 'ProductID'),
+        'sales': ('OrderID', 'ProductID'),
+        'comprehensive': ('OrderID', 'ProductID', 'CustomerID', 'EmployeeID', 'CategoryID')
+    }
+    for table, columns in key_columns.items():
+        for col in columns:
+            if col not in data[table].columns:
+                continue
+            if pd.api.types.is_integer_dtype(data[table][col]):
+                data[table][col] = data[table][col].astype('int32')
+            elif not pd.api.types.is_numeric_dtype(data[table][col]):
+                data[table][col] = data[table][col].astype('category')
+    
+    # Low-cardinality text columns are stored as categoricals so the filters,
+    # value_counts and nunique calls work on integer codes
+    category_columns = {
+        'customers': ('Country', 'City', 'ContactTitle'),
+        'orders': ('ShipCountry', 'ShipCity'),
+        'employees': ('Title', 'Country', 'City'),
+        'sales': ('CategoryName', 'ShipCountry'),
+        'comprehensive': (
+            'ShipCity', 'ShipCountry', 'CategoryName', 'ContactTitle', 'CustomerCity',
+            'CustomerCountry', 'Title', 'EmployeeCity', 'EmployeeCountry'
+        )
+    }
+    for table, columns in category_columns.items():
+        for col in columns:
+            if col in data[table].columns:
+                data[table][col] = data[table][col].astype('category')
+    
+    # Unfiltered page summaries, computed once per load and read directly by
+    # the pages while every filter is at its default
+    summarizers = {
+        'customers': summarize_customers,
+        'orders': summarize_orders,
+        'sales': summarize_sales,
+        'employees': summarize_employees
+    }
+    data['summaries'] = {
+        table: summarize(data[table])
+        for table, summarize in summarizers.items()
+        if not data[table].empty
+    }
+    
+    # Identifies this load in the keys of the per-filter aggregate caches
+    data['version'] = datetime.now().isoformat()
+    
+    # Orders handled per employee for the Employees page performance chart,
+    # aggregated in a single unsorted groupby pass
+    if 'EmployeeID' in data['orders'].columns:
+        data['summaries']['employee_orders'] = (
+            data['orders'].groupby('EmployeeID', sort=False)
+            .agg(OrderCount=('OrderID', 'size'))['OrderCount']
+            .sort_values(ascending=False)
+        )
+    
+    # Sorted sidebar option lists, built once per load instead of on every rerun
+    options = {}
+    if not data['customers'].empty:
+        customers = data['customers']
+        options['countries'] = ['All'] + present_values(customers['Country'])
+        options['cities'] = ['All'] + present_values(customers['City'])
+        options['cities_by_country'] = {
+            country: ['All'] + present_values(cities)
+            for country, cities in customers.groupby('Country', observed=True)['City']
+        }
+    if not data['orders'].empty:
+        options['ship_countries'] = ['All'] + present_values(data['orders']['ShipCountry'])
+        options['order_date_range'] = (data['orders']['OrderDate'].min(), data['orders']['OrderDate'].max())
+    if not data['sales'].empty:
+        options['sales_categories'] = ['All'] + present_values(data['sales']['CategoryName'])
+    if not data['employees'].empty:
+        employees = data['employees']
+        options['employee_titles'] = ['All'] + present_values(employees['Title'])
+        options['employee_countries'] = ['All'] + present_values(employees['Country'])
+        options['employee_countries_by_title'] = {
+            title: ['All'] + present_values(countries)
+            for title, countries in employees.groupby('Title', observed=True)['Country']
+        }
+    options['relationships'] = build_relationship_dropdowns(data)
+    data['options'] = options
+    
+    # The pages handle empty tables, so a partial load is still handed back to
+    # the caller through the exception; raising keeps it out of the cache
+    if failures:
+        raise TableLoadError(failures, data)
+    
+    return data
+
+def present_values(series):
+    """Sorted values of a categorical column that occur in the given rows"""
+    return series.cat.remove_unused_categories().cat.categories.tolist()
+
+def render_key_values(row):
+    """Render one record as a two-column HTML table in a single markdown element"""
+    rows = ''.join(
+        f"<tr><td><b>{html.escape(str(key))}</b></td><td>{'' if pd.isna(value) else html.escape(str(value))}</td></tr>"
+        for key, value in row.items()
+    )
+    st.markdown(f"<table>{rows}</table>", unsafe_allow_html=True)
+
+def show_paginated_table(df, key, columns=None, page_size=500):
+    """Show a table one page at a time so only the visible rows are sent to the browser.
+    The rows of the page are sliced before `columns` are selected, so only that page is copied"""
+    start = 0
+    if len(df) > page_size:
+        pages = -(-len(df) // page_size)
+        page = st.number_input(f"Page (1-{pages}):", min_value=1, max_value=pages, value=1, key=key)
+        start = (page - 1) * page_size
+        st.caption(f"Rows {start + 1:,}-{min(start + page_size, len(df)):,} of {len(df):,}")
+    rows = df.iloc[start:start + page_size]
+    st.dataframe(rows if columns is None else rows[columns], use_container_width=True)
+
+def dropdown_options(labels, ids):
+    """Selectbox options (the ids themselves) and the id-to-label map used as
+    the format_func lookup for one relationship filter"""
+    ids = ids.tolist()
+    return ['All'] + ids, {'All': 'All', **dict(zip(ids, labels.tolist()))}
+
+def build_relationship_dropdowns(data):
+    """Id options and id-to-label maps for the Data Relationships sidebar filters.
+    Labels are built with vectorized string concatenation and zipped with their ids in one pass"""
+    dropdowns = {table: (['All'], {'All': 'All'}) for table in RELATIONSHIP_FILTER_KINDS}
+    
+    if not data['orders'].empty:
+        order_ids = pd.Series(np.sort(data['orders']['OrderID'].unique()))
+        dropdowns['orders'] = dropdown_options('Order #' + order_ids.astype(str), order_ids)
+    
+    if not data['customers'].empty:
+        customers = data['customers']
+        dropdowns['customers'] = dropdown_options(
+            customers['CompanyName'].astype(str) + ' (' + customers['CustomerID'].astype(str) + ')',
+            customers['CustomerID']
+        )
+    
+    if not data['employees'].empty:
+        employees = data['employees']
+        dropdowns['employees'] = dropdown_options(
+            employees['FullName'].astype(str) + ' (' + employees['EmployeeID'].astype(str) + ')',
+            employees['EmployeeID']
+        )
+    
+    if not data['products'].empty:
+        products = data['products']
+        dropdowns['products'] = dropdown_options(
+            products['ProductName'].astype(str) + ' (' + products['ProductID'].astype(str) + ')',
+            products['ProductID']
+        )
+    
+    if not data['categories'].empty:
+        categories = data['categories']
+        dropdowns['categories'] = dropdown_options(
+            categories['CategoryName'].astype(str) + ' (' + categories['CategoryID'].astype(str) + ')',
+            categories['CategoryID']
+        )
+    
+    return dropdowns
+
+def count_values(series, top=None):
+    """Value counts without the categories that have no rows in the filtered data,
+    optionally only the `top` largest (selected with nlargest rather than a full sort)"""
+    if top is None:
+        counts = series.value_counts()
+    else:
+        counts = series.value_counts(sort=False).nlargest(top)
+    return counts[counts > 0]
+
+def filter_customers(customers_df, country, city):
+    """Apply the Customer Insights country/city selections as one combined mask"""
+    mask = pd.Series(True, index=customers_df.index)
+    if country != 'All':
+        mask &= customers_df['Country'].eq(country)
+    if city != 'All':
+        mask &= customers_df['City'].eq(city)
+    return customers_df[mask]
+
+def date_range_mask(dates, date_range):
+    """Mask of the datetime64 values falling on the inclusive (start, end) dates.
+    Half-open Timestamp bounds compare on the datetime64 values directly"""
+    start_ts = pd.Timestamp(date_range[0])
+    end_ts = pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)
+    return (dates >= start_ts) & (dates < end_ts)
+
+def filter_orders(orders_df, date_range, country):
+    """Apply the Orders Overview date range and ship country selections as one combined mask"""
+    mask = pd.Series(True, index=orders_df.index)
+    if date_range is not None:
+        mask &= date_range_mask(orders_df['OrderDate'], date_range)
+    if country != 'All':
+        mask &= orders_df['ShipCountry'].eq(country)
+    return orders_df[mask]
+
+def filter_sales(sales_df, category, date_range):
+    """Apply the Sales & Products category and date range selections as one combined mask"""
+    mask = pd.Series(True, index=sales_df.index)
+    if category != 'All':
+        mask &= sales_df['CategoryName'].eq(category)
+    if date_range is not None:
+        mask &= date_range_mask(sales_df['OrderDate'], date_range)
+    return sales_df[mask]
+
+def summarize_customers(customers_df):
+    """Customer Insights metrics and chart counts for a set of customers"""
+    return {
+        'total': len(customers_df),
+        'cities': customers_df['City'].nunique(),
+        'countries': customers_df['Country'].nunique(),
+        'with_phone': int(customers_df['Phone'].notna().sum()),
+        'country_counts': count_values(customers_df['Country']),
+        'city_counts': count_values(customers_df['City'], top=10),
+        'title_counts': count_values(customers_df['ContactTitle'], top=8)
+    }
+
+def summarize_orders(orders_df):
+    """Orders Overview metrics and chart counts for a set of orders"""
+    return {
+        'customers': orders_df['CustomerID'].nunique(),
+        'countries': orders_df['ShipCountry'].nunique(),
+        'orders_by_date': orders_df.groupby(orders_df['OrderDate'].dt.normalize()).size().reset_index(name='count'),
+        'country_counts': count_values(orders_df['ShipCountry'], top=10),
+        'customer_counts': count_values(orders_df['CustomerID'], top=10)
+    }
+
+def summarize_sales(sales_df):
+    """Sales & Products metrics and chart series for a set of sales lines"""
+    return {
+        'revenue': sales_df['Revenue'].sum(),
+        'orders': sales_df['OrderID'].nunique(),
+        'products': sales_df['ProductID'].nunique(),
+        'category_revenue': sales_df.groupby('CategoryName', observed=True)['Revenue'].sum().sort_values(ascending=False),
+        'product_sales': sales_df.groupby('ProductName')['Quantity'].sum().nlargest(10),
+        'daily_revenue': sales_df.groupby(sales_df['OrderDate'].dt.normalize())['Revenue'].sum().reset_index()
+    }
+
+def filter_employees(employees_df, title, country):
+    """Apply the Employees title and country selections as one combined mask"""
+    mask = pd.Series(True, index=employees_df.index)
+    if title != 'All':
+        mask &= employees_df['Title'].eq(title)
+    if country != 'All':
+        mask &= employees_df['Country'].eq(country)
+    return employees_df[mask]
+
+def summarize_employees(employees_df):
+    """Employees metrics and chart counts for a set of employees. The per-group
+    counts come from an unsorted groupby size with a single sort of the result"""
+    return {
+        'total': len(employees_df),
+        'titles': employees_df['Title'].nunique(),
+        'countries': employees_df['Country'].nunique(),
+        'cities': employees_df['City'].nunique(),
+        'title_counts': employees_df.groupby('Title', sort=False, observed=True).size().sort_values(ascending=False),
+        'country_counts': employees_df.groupby('Country', sort=False, observed=True).size().sort_values(ascending=False)
+    }
+
+# The unfiltered summaries are precomputed in load_all_data. The helpers below
+# cover the other filter combinations. They take the session's table unhashed
+# and are keyed on the load's version plus the selections, so revisiting a
+# combination skips the value_counts/groupby work entirely and the results
+# always come from the same load as the tables shown on the page
+@st.cache_data(show_spinner=False)
+def customer_aggregates(_customers, version, country, city):
+    """Compute the Customer Insights metrics and chart counts for one filter combination"""
+    return summarize_customers(filter_customers(_customers, country, city))
+
+@st.cache_data(show_spinner=False)
+def order_aggregates(_orders, version, date_range, country):
+    """Compute the Orders Overview metrics and chart counts for one filter combination"""
+    return summarize_orders(filter_orders(_orders, date_range, country))
+
+@st.cache_data(show_spinner=False)
+def sales_aggregates(_sales, version, category, date_range):
+    """Compute the Sales & Products metrics and chart series for one filter combination"""
+    return summarize_sales(filter_sales(_sales, category, date_range))
+
+@st.cache_data(show_spinner=False)
+def employee_aggregates(_employees, version, title, country):
+    """Compute the Employees metrics and chart counts for one filter combination"""
+    return summarize_employees(filter_employees(_employees, title, country))
+
+def to_csv_bytes(df):
+    """Serialize a table to UTF-8 CSV bytes with Arrow's C++ writer"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Write timestamps at second resolution rather than with a fractional part
+    table = table.cast(pa.schema([
+        field.with_type(pa.timestamp('s')) if pa.types.is_timestamp(field.type) else field
+        for field in table.schema
+    ]), safe=False)
+    buffer = io.BytesIO()
+    pacsv.write_csv(table, buffer)
+    return buffer.getvalue()
+
+def to_parquet_bytes(df):
+    """Serialize a table to Parquet bytes for the compact export option"""
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+# Figures are cached as shared objects keyed by hashable tuples, so reruns with
+# a previously seen filter skip rebuilding the Plotly figure tree
+@st.cache_resource(show_spinner=False)
+def bar_figure(names, values, title, name_label, value_label, scale, horizontal=False, height=None):
+    """Build a bar chart of counts or totals, colored by value"""
+    if horizontal:
+        fig = px.bar(
+            x=list(values),
+            y=list(names),
+            orientation='h',
+            title=title,
+            labels={'x': value_label, 'y': name_label},
+            color=list(values),
+            color_continuous_scale=scale
+        )
+    else:
+        fig = px.bar(
+            x=list(names),
+            y=list(values),
+            title=title,
+            labels={'x': name_label, 'y': value_label},
+            color=list(values),
+            color_continuous_scale=scale
+        )
+        fig.update_xaxes(tickangle=45)
+    if height:
+        fig.update_layout(height=height)
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def pie_figure(names, values, title, height=None):
+    """Build a donut chart of counts or totals"""
+    fig = px.pie(
+        values=list(values),
+        names=list(names),
+        title=title,
+        hole=0.3
+    )
+    if height:
+        fig.update_layout(height=height)
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def styled_bar_figure(names, values, title, name_label, value_label, scale):
+    """Build a bar chart in the white Data Relationships chart style"""
+    fig = px.bar(
+        x=list(names),
+        y=list(values),
+        title=title,
+        labels={'x': name_label, 'y': value_label},
+        color=list(values),
+        color_continuous_scale=scale
+    )
+    fig.update_layout(
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        title_font_size=16,
+        title_font_color='#2E86AB',
+        xaxis_tickangle=-45
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def line_figure(x, y, title, x_label, y_label, height=None):
+    """Build a line chart over dates"""
+    fig = px.line(
+        x=list(x),
+        y=list(y),
+        title=title,
+        labels={'x': x_label, 'y': y_label}
+    )
+    if height:
+        fig.update_layout(height=height)
+    return fig
 
 def customer_insights_page(data):
     """Customer Insights Dashboard"""
@@ -233,23 +741,23 @@ def customer_insights_page(data):
     st.sidebar.header("🔍 Customer Filters")
     
     # Country filter
-    countries = ['All'] + sorted(customers_df['Country'].unique().tolist())
+    countries = data['options']['countries']
     selected_country = st.sidebar.selectbox("Select Country:", countries)
     
     # City filter (filtered based on selected country)
     if selected_country != 'All':
-        cities = ['All'] + sorted(customers_df[customers_df['Country'] == selected_country]['City'].unique().tolist())
+        cities = data['options']['cities_by_country'][selected_country]
     else:
-        cities = ['All'] + sorted(customers_df['City'].unique().tolist())
+        cities = data['options']['cities']
     
     selected_city = st.sidebar.selectbox("Select City:", cities)
     
     # Apply filters
-    filtered_customers = customers_df.copy()
-    if selected_country != 'All':
-        filtered_customers = filtered_customers[filtered_customers['Country'] == selected_country]
-    if selected_city != 'All':
-        filtered_customers = filtered_customers[filtered_customers['City'] == selected_city]
+    filtered_customers = filter_customers(customers_df, selected_country, selected_city)
+    if selected_country == 'All' and selected_city == 'All':
+        aggregates = data['summaries']['customers']
+    else:
+        aggregates = customer_aggregates(data['customers'], data['version'], selected_country, selected_city)
     
     # Key Metrics
     st.header("📈 Key Metrics")
@@ -260,7 +768,7 @@ def customer_insights_page(data):
         st.markdown(f"""
         <div class="metric-card">
             <h3>Total Customers</h3>
-            <h2>{len(filtered_customers):,}</h2>
+            <h2>{aggregates['total']:,}</h2>
         </div>
         """, unsafe_allow_html=True)
     
@@ -268,7 +776,7 @@ def customer_insights_page(data):
         st.markdown(f"""
         <div class="metric-card">
             <h3>Unique Cities</h3>
-            <h2>{filtered_customers['City'].nunique():,}</h2>
+            <h2>{aggregates['cities']:,}</h2>
         </div>
         """, unsafe_allow_html=True)
     
@@ -276,7 +784,7 @@ def customer_insights_page(data):
         st.markdown(f"""
         <div class="metric-card">
             <h3>Unique Countries</h3>
-            <h2>{filtered_customers['Country'].nunique():,}</h2>
+            <h2>{aggregates['countries']:,}</h2>
         </div>
         """, unsafe_allow_html=True)
     
@@ -284,7 +792,7 @@ def customer_insights_page(data):
         st.markdown(f"""
         <div class="metric-card">
             <h3>With Phone</h3>
-            <h2>{len(filtered_customers[filtered_customers['Phone'] != 'N/A']):,}</h2>
+            <h2>{aggregates['with_phone']:,}</h2>
         </div>
         """, unsafe_allow_html=True)
     
@@ -297,68 +805,63 @@ def customer_insights_page(data):
     
     with col1:
         st.subheader("Customers by Country")
-        country_counts = filtered_customers['Country'].value_counts()
-        fig_country = px.pie(
-            values=country_counts.values,
-            names=country_counts.index,
-            title="Customer Distribution by Country",
-            hole=0.3
+        country_counts = aggregates['country_counts']
+        fig_country = pie_figure(
+            tuple(country_counts.index),
+            tuple(country_counts.values),
+            "Customer Distribution by Country",
+            height=400
         )
-        fig_country.update_layout(height=400)
         st.plotly_chart(fig_country, use_container_width=True)
     
     with col2:
         st.subheader("Top Cities by Customer Count")
-        city_counts = filtered_customers['City'].value_counts().head(10)
-        # Create DataFrame for plotting
-        city_df = pd.DataFrame({
-            'City': city_counts.index,
-            'Count': city_counts.values
-        })
-        fig_city = px.bar(
-            city_df,
-            x='Count',
-            y='City',
-            orientation='h',
-            title="Top 10 Cities by Customer Count",
-            labels={'Count': 'Number of Customers', 'City': 'City'},
-            color='Count',
-            color_continuous_scale='Blues'
+        city_counts = aggregates['city_counts']
+        fig_city = bar_figure(
+            tuple(city_counts.index),
+            tuple(city_counts.values),
+            "Top 10 Cities by Customer Count",
+            'City',
+            'Number of Customers',
+            'Blues',
+            horizontal=True,
+            height=400
         )
-        fig_city.update_layout(height=400)
         st.plotly_chart(fig_city, use_container_width=True)
     
     # Contact Titles Distribution
     st.subheader("Contact Titles Distribution")
-    title_counts = filtered_customers['ContactTitle'].value_counts().head(8)
-    # Create DataFrame for plotting
-    title_df = pd.DataFrame({
-        'Title': title_counts.index,
-        'Count': title_counts.values
-    })
-    fig_title = px.bar(
-        title_df,
-        x='Title',
-        y='Count',
-        title="Top Contact Titles",
-        labels={'Title': 'Contact Title', 'Count': 'Count'},
-        color='Count',
-        color_continuous_scale='Greens'
+    title_counts = aggregates['title_counts']
+    fig_title = bar_figure(
+        tuple(title_counts.index),
+        tuple(title_counts.values),
+        "Top Contact Titles",
+        'Contact Title',
+        'Count',
+        'Greens'
     )
-    fig_title.update_xaxes(tickangle=45)
     st.plotly_chart(fig_title, use_container_width=True)
     
     # Download section
     st.markdown("---")
     st.header("💾 Export Customer Data")
     
-    csv_data = filtered_customers.to_csv(index=False)
-    st.download_button(
-        label="📥 Download Customer Data (CSV)",
-        data=csv_data,
-        file_name=f"customer_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv"
-    )
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="📥 Download Customer Data (CSV)",
+            data=partial(to_csv_bytes, filtered_customers),
+            file_name=f"customer_data_{timestamp}.csv",
+            mime="text/csv"
+        )
+    with col2:
+        st.download_button(
+            label="📥 Download Customer Data (Parquet)",
+            data=partial(to_parquet_bytes, filtered_customers),
+            file_name=f"customer_data_{timestamp}.parquet",
+            mime="application/vnd.apache.parquet"
+        )
 
 def orders_overview_page(data):
     """Orders Overview Dashboard"""
@@ -370,48 +873,38 @@ def orders_overview_page(data):
     
     orders_df = data['orders']
     
-    # Convert date columns if they exist
-    date_columns = ['OrderDate', 'RequiredDate', 'ShippedDate']
-    for col in date_columns:
-        if col in orders_df.columns:
-            orders_df[col] = pd.to_datetime(orders_df[col], errors='coerce')
-    
     # Sidebar filters
     st.sidebar.header("🔍 Order Filters")
     
     # Date filter
-    if 'OrderDate' in orders_df.columns:
-        min_date = orders_df['OrderDate'].min()
-        max_date = orders_df['OrderDate'].max()
+    selected_range = None
+    min_date = orders_df['OrderDate'].min()
+    max_date = orders_df['OrderDate'].max()
+    
+    if pd.notna(min_date) and pd.notna(max_date):
+        date_range = st.sidebar.date_input(
+            "Select Date Range:",
+            value=(min_date.date(), max_date.date()),
+            min_value=min_date.date(),
+            max_value=max_date.date()
+        )
         
-        if pd.notna(min_date) and pd.notna(max_date):
-            date_range = st.sidebar.date_input(
-                "Select Date Range:",
-                value=(min_date.date(), max_date.date()),
-                min_value=min_date.date(),
-                max_value=max_date.date()
-            )
-            
-            if len(date_range) == 2:
-                start_date, end_date = date_range
-                filtered_orders = orders_df[
-                    (orders_df['OrderDate'].dt.date >= start_date) &
-                    (orders_df['OrderDate'].dt.date <= end_date)
-                ]
-            else:
-                filtered_orders = orders_df
-        else:
-            filtered_orders = orders_df
+        # The full default range is the same as no date filter
+        if len(date_range) == 2 and tuple(date_range) != (min_date.date(), max_date.date()):
+            selected_range = tuple(date_range)
+    
+    # Ship country filter, limited to the countries in the selected date range
+    if selected_range is None:
+        countries = data['options']['ship_countries']
     else:
-        filtered_orders = orders_df
+        countries = ['All'] + present_values(filter_orders(orders_df, selected_range, 'All')['ShipCountry'])
+    selected_country = st.sidebar.selectbox("Ship Country:", countries)
     
-    # Status filter (if available)
-    if 'ShipCountry' in filtered_orders.columns:
-        countries = ['All'] + sorted(filtered_orders['ShipCountry'].unique().tolist())
-        selected_country = st.sidebar.selectbox("Ship Country:", countries)
-        
-        if selected_country != 'All':
-            filtered_orders = filtered_orders[filtered_orders['ShipCountry'] == selected_country]
+    filtered_orders = filter_orders(orders_df, selected_range, selected_country)
+    if selected_range is None and selected_country == 'All':
+        aggregates = data['summaries']['orders']
+    else:
+        aggregates = order_aggregates(data['orders'], data['version'], selected_range, selected_country)
     
     # Key Metrics
     st.header("📈 Order Metrics")
@@ -438,7 +931,7 @@ def orders_overview_page(data):
         """, unsafe_allow_html=True)
     
     with col3:
-        unique_customers = filtered_orders['CustomerID'].nunique() if 'CustomerID' in filtered_orders.columns else 0
+        unique_customers = aggregates['customers']
         st.markdown(f"""
         <div class="metric-card">
             <h3>Unique Customers</h3>
@@ -447,7 +940,7 @@ def orders_overview_page(data):
         """, unsafe_allow_html=True)
     
     with col4:
-        unique_countries = filtered_orders['ShipCountry'].nunique() if 'ShipCountry' in filtered_orders.columns else 0
+        unique_countries = aggregates['countries']
         st.markdown(f"""
         <div class="metric-card">
             <h3>Ship Countries</h3>
@@ -465,144 +958,107 @@ def orders_overview_page(data):
     with col1:
         if 'OrderDate' in filtered_orders.columns:
             st.subheader("Orders Over Time")
-            orders_by_date = filtered_orders.groupby(filtered_orders['OrderDate'].dt.date).size().reset_index(name='count')
-            orders_by_date['OrderDate'] = pd.to_datetime(orders_by_date['OrderDate']).dt.date
-            fig_time = px.line(
-                x=orders_by_date['OrderDate'],
-                y=orders_by_date['count'],
-                title="Orders Over Time",
-                labels={'x': 'Date', 'y': 'Number of Orders'}
+            orders_by_date = aggregates['orders_by_date']
+            fig_time = line_figure(
+                tuple(orders_by_date['OrderDate']),
+                tuple(orders_by_date['count']),
+                "Orders Over Time",
+                'Date',
+                'Number of Orders',
+                height=400
             )
-            fig_time.update_layout(height=400)
             st.plotly_chart(fig_time, use_container_width=True)
     
     with col2:
         if 'ShipCountry' in filtered_orders.columns:
             st.subheader("Orders by Country")
-            country_counts = filtered_orders['ShipCountry'].value_counts().head(10)
-            fig_country = px.bar(
-                x=country_counts.index,
-                y=country_counts.values,
-                title="Top 10 Countries by Orders",
-                labels={'x': 'Country', 'y': 'Number of Orders'},
-                color=country_counts.values,
-                color_continuous_scale='Reds'
+            country_counts = aggregates['country_counts']
+            fig_country = bar_figure(
+                tuple(country_counts.index),
+                tuple(country_counts.values),
+                "Top 10 Countries by Orders",
+                'Country',
+                'Number of Orders',
+                'Reds',
+                height=400
             )
-            fig_country.update_xaxes(tickangle=45)
-            fig_country.update_layout(height=400)
             st.plotly_chart(fig_country, use_container_width=True)
     
     # Top Customers
     if 'CustomerID' in filtered_orders.columns:
         st.subheader("Top Customers by Orders")
-        customer_counts = filtered_orders['CustomerID'].value_counts().head(10)
-        fig_customers = px.bar(
-            x=customer_counts.index,
-            y=customer_counts.values,
-            title="Top 10 Customers by Order Count",
-            labels={'x': 'Customer ID', 'y': 'Number of Orders'},
-            color=customer_counts.values,
-            color_continuous_scale='Purples'
+        customer_counts = aggregates['customer_counts']
+        fig_customers = bar_figure(
+            tuple(customer_counts.index),
+            tuple(customer_counts.values),
+            "Top 10 Customers by Order Count",
+            'Customer ID',
+            'Number of Orders',
+            'Purples'
         )
-        fig_customers.update_xaxes(tickangle=45)
         st.plotly_chart(fig_customers, use_container_width=True)
     
     # Download section
     st.markdown("---")
     st.header("💾 Export Order Data")
     
-    csv_data = filtered_orders.to_csv(index=False)
-    st.download_button(
-        label="📥 Download Order Data (CSV)",
-        data=csv_data,
-        file_name=f"order_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv"
-    )
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="📥 Download Order Data (CSV)",
+            data=partial(to_csv_bytes, filtered_orders),
+            file_name=f"order_data_{timestamp}.csv",
+            mime="text/csv"
+        )
+    with col2:
+        st.download_button(
+            label="📥 Download Order Data (Parquet)",
+            data=partial(to_parquet_bytes, filtered_orders),
+            file_name=f"order_data_{timestamp}.parquet",
+            mime="application/vnd.apache.parquet"
+        )
 
 def sales_products_page(data):
     """Sales & Products Dashboard"""
     st.markdown('<h1 class="main-header">💰 Sales & Products</h1>', unsafe_allow_html=True)
     
-    # Check if we have the necessary tables
-    if data['orderdetails'].empty or data['products'].empty:
-        st.error("OrderDetails or Products data not available")
-        return
-    
-    # Create sales data by joining tables
-    try:
-        # Join OrderDetails with Products
-        sales_df = data['orderdetails'].merge(
-            data['products'], 
-            left_on='ProductID', 
-            right_on='ProductID', 
-            how='left',
-            suffixes=('_order', '_product')
-        )
-        
-        # Join with Categories if available
-        if not data['categories'].empty:
-            sales_df = sales_df.merge(
-                data['categories'],
-                left_on='CategoryID',
-                right_on='CategoryID',
-                how='left'
-            )
-        
-        # Calculate revenue - use the UnitPrice from OrderDetails (UnitPrice_order)
-        if 'UnitPrice_order' in sales_df.columns and 'Quantity' in sales_df.columns:
-            sales_df['Revenue'] = sales_df['UnitPrice_order'] * sales_df['Quantity']
-        elif 'UnitPrice' in sales_df.columns and 'Quantity' in sales_df.columns:
-            sales_df['Revenue'] = sales_df['UnitPrice'] * sales_df['Quantity']
-        else:
-            st.error("Required columns for revenue calculation not found")
-            return
-        
-        # Join with Orders for date information
-        if not data['orders'].empty:
-            sales_df = sales_df.merge(
-                data['orders'][['OrderID', 'OrderDate', 'ShipCountry']],
-                left_on='OrderID',
-                right_on='OrderID',
-                how='left'
-            )
-            
-            if 'OrderDate' in sales_df.columns:
-                sales_df['OrderDate'] = pd.to_datetime(sales_df['OrderDate'], errors='coerce')
-        
-    except Exception as e:
-        st.error(f"Error creating sales data: {str(e)}")
+    # Sales lines are joined and priced by SQL Server in load_all_data
+    sales_df = data['sales']
+    if sales_df.empty:
+        st.error("Sales data not available")
         return
     
     # Sidebar filters
     st.sidebar.header("🔍 Sales Filters")
     
     # Category filter
-    if 'CategoryName' in sales_df.columns:
-        categories = ['All'] + sorted(sales_df['CategoryName'].unique().tolist())
-        selected_category = st.sidebar.selectbox("Select Category:", categories)
+    categories = data['options']['sales_categories']
+    selected_category = st.sidebar.selectbox("Select Category:", categories)
+    category_sales = filter_sales(sales_df, selected_category, None)
+    
+    # Date filter, bounded by the selected category's order dates
+    selected_range = None
+    min_date = category_sales['OrderDate'].min()
+    max_date = category_sales['OrderDate'].max()
+    
+    if pd.notna(min_date) and pd.notna(max_date):
+        date_range = st.sidebar.date_input(
+            "Select Date Range:",
+            value=(min_date.date(), max_date.date()),
+            min_value=min_date.date(),
+            max_value=max_date.date()
+        )
         
-        if selected_category != 'All':
-            sales_df = sales_df[sales_df['CategoryName'] == selected_category]
+        # The full default range is the same as no date filter
+        if len(date_range) == 2 and tuple(date_range) != (min_date.date(), max_date.date()):
+            selected_range = tuple(date_range)
     
-    # Date filter
-    if 'OrderDate' in sales_df.columns:
-        min_date = sales_df['OrderDate'].min()
-        max_date = sales_df['OrderDate'].max()
-        
-        if pd.notna(min_date) and pd.notna(max_date):
-            date_range = st.sidebar.date_input(
-                "Select Date Range:",
-                value=(min_date.date(), max_date.date()),
-                min_value=min_date.date(),
-                max_value=max_date.date()
-            )
-            
-            if len(date_range) == 2:
-                start_date, end_date = date_range
-                sales_df = sales_df[
-                    (sales_df['OrderDate'].dt.date >= start_date) &
-                    (sales_df['OrderDate'].dt.date <= end_date)
-                ]
+    sales_df = filter_sales(sales_df, selected_category, selected_range)
+    if selected_range is None and selected_category == 'All':
+        aggregates = data['summaries']['sales']
+    else:
+        aggregates = sales_aggregates(data['sales'], data['version'], selected_category, selected_range)
     
     # Key Metrics
     st.header("📈 Sales Metrics")
@@ -610,7 +1066,7 @@ def sales_products_page(data):
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_revenue = sales_df['Revenue'].sum() if 'Revenue' in sales_df.columns else 0
+        total_revenue = aggregates['revenue']
         st.markdown(f"""
         <div class="metric-card">
             <h3>Total Revenue</h3>
@@ -619,7 +1075,7 @@ def sales_products_page(data):
         """, unsafe_allow_html=True)
     
     with col2:
-        total_orders = sales_df['OrderID'].nunique()
+        total_orders = aggregates['orders']
         st.markdown(f"""
         <div class="metric-card">
             <h3>Total Orders</h3>
@@ -628,7 +1084,7 @@ def sales_products_page(data):
         """, unsafe_allow_html=True)
     
     with col3:
-        total_products = sales_df['ProductID'].nunique()
+        total_products = aggregates['products']
         st.markdown(f"""
         <div class="metric-card">
             <h3>Products Sold</h3>
@@ -655,48 +1111,41 @@ def sales_products_page(data):
     with col1:
         if 'CategoryName' in sales_df.columns:
             st.subheader("Revenue by Category")
-            category_revenue = sales_df.groupby('CategoryName')['Revenue'].sum().sort_values(ascending=False)
-            fig_category = px.pie(
-                values=category_revenue.values,
-                names=category_revenue.index,
-                title="Revenue Distribution by Category",
-                hole=0.3
+            category_revenue = aggregates['category_revenue']
+            fig_category = pie_figure(
+                tuple(category_revenue.index),
+                tuple(category_revenue.values),
+                "Revenue Distribution by Category",
+                height=400
             )
-            fig_category.update_layout(height=400)
             st.plotly_chart(fig_category, use_container_width=True)
     
     with col2:
         if 'ProductName' in sales_df.columns:
             st.subheader("Best Selling Products")
-            product_sales = sales_df.groupby('ProductName')['Quantity'].sum().sort_values(ascending=False).head(10)
-            # Create DataFrame for plotting
-            product_df = pd.DataFrame({
-                'Product': product_sales.index,
-                'Quantity': product_sales.values
-            })
-            fig_products = px.bar(
-                product_df,
-                x='Quantity',
-                y='Product',
-                orientation='h',
-                title="Top 10 Products by Quantity Sold",
-                labels={'Quantity': 'Quantity Sold', 'Product': 'Product'},
-                color='Quantity',
-                color_continuous_scale='Greens'
+            product_sales = aggregates['product_sales']
+            fig_products = bar_figure(
+                tuple(product_sales.index),
+                tuple(product_sales.values),
+                "Top 10 Products by Quantity Sold",
+                'Product',
+                'Quantity Sold',
+                'Greens',
+                horizontal=True,
+                height=400
             )
-            fig_products.update_layout(height=400)
             st.plotly_chart(fig_products, use_container_width=True)
     
     # Revenue over time
     if 'OrderDate' in sales_df.columns:
         st.subheader("Revenue Over Time")
-        daily_revenue = sales_df.groupby(sales_df['OrderDate'].dt.date)['Revenue'].sum().reset_index()
-        daily_revenue['OrderDate'] = pd.to_datetime(daily_revenue['OrderDate']).dt.date
-        fig_revenue = px.line(
-            x=daily_revenue['OrderDate'],
-            y=daily_revenue['Revenue'],
-            title="Daily Revenue",
-            labels={'x': 'Date', 'y': 'Revenue ($)'}
+        daily_revenue = aggregates['daily_revenue']
+        fig_revenue = line_figure(
+            tuple(daily_revenue['OrderDate']),
+            tuple(daily_revenue['Revenue']),
+            "Daily Revenue",
+            'Date',
+            'Revenue ($)'
         )
         st.plotly_chart(fig_revenue, use_container_width=True)
     
@@ -704,13 +1153,22 @@ def sales_products_page(data):
     st.markdown("---")
     st.header("💾 Export Sales Data")
     
-    csv_data = sales_df.to_csv(index=False)
-    st.download_button(
-        label="📥 Download Sales Data (CSV)",
-        data=csv_data,
-        file_name=f"sales_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv"
-    )
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="📥 Download Sales Data (CSV)",
+            data=partial(to_csv_bytes, sales_df),
+            file_name=f"sales_data_{timestamp}.csv",
+            mime="text/csv"
+        )
+    with col2:
+        st.download_button(
+            label="📥 Download Sales Data (Parquet)",
+            data=partial(to_parquet_bytes, sales_df),
+            file_name=f"sales_data_{timestamp}.parquet",
+            mime="application/vnd.apache.parquet"
+        )
 
 def employees_page(data):
     """Employees Dashboard"""
@@ -726,20 +1184,21 @@ def employees_page(data):
     st.sidebar.header("🔍 Employee Filters")
     
     # Title filter
-    if 'Title' in employees_df.columns:
-        titles = ['All'] + sorted(employees_df['Title'].unique().tolist())
-        selected_title = st.sidebar.selectbox("Select Title:", titles)
-        
-        if selected_title != 'All':
-            employees_df = employees_df[employees_df['Title'] == selected_title]
+    titles = data['options']['employee_titles']
+    selected_title = st.sidebar.selectbox("Select Title:", titles)
     
     # Country filter
-    if 'Country' in employees_df.columns:
-        countries = ['All'] + sorted(employees_df['Country'].unique().tolist())
-        selected_country = st.sidebar.selectbox("Select Country:", countries)
-        
-        if selected_country != 'All':
-            employees_df = employees_df[employees_df['Country'] == selected_country]
+    if selected_title != 'All':
+        countries = data['options']['employee_countries_by_title'][selected_title]
+    else:
+        countries = data['options']['employee_countries']
+    selected_country = st.sidebar.selectbox("Select Country:", countries)
+    
+    employees_df = filter_employees(employees_df, selected_title, selected_country)
+    if selected_title == 'All' and selected_country == 'All':
+        aggregates = data['summaries']['employees']
+    else:
+        aggregates = employee_aggregates(data['employees'], data['version'], selected_title, selected_country)
     
     # Key Metrics
     st.header("📈 Employee Metrics")
@@ -750,12 +1209,12 @@ def employees_page(data):
         st.markdown(f"""
         <div class="metric-card">
             <h3>Total Employees</h3>
-            <h2>{len(employees_df):,}</h2>
+            <h2>{aggregates['total']:,}</h2>
         </div>
         """, unsafe_allow_html=True)
     
     with col2:
-        unique_titles = employees_df['Title'].nunique() if 'Title' in employees_df.columns else 0
+        unique_titles = aggregates['titles']
         st.markdown(f"""
         <div class="metric-card">
             <h3>Job Titles</h3>
@@ -764,7 +1223,7 @@ def employees_page(data):
         """, unsafe_allow_html=True)
     
     with col3:
-        unique_countries = employees_df['Country'].nunique() if 'Country' in employees_df.columns else 0
+        unique_countries = aggregates['countries']
         st.markdown(f"""
         <div class="metric-card">
             <h3>Countries</h3>
@@ -773,7 +1232,7 @@ def employees_page(data):
         """, unsafe_allow_html=True)
     
     with col4:
-        unique_cities = employees_df['City'].nunique() if 'City' in employees_df.columns else 0
+        unique_cities = aggregates['cities']
         st.markdown(f"""
         <div class="metric-card">
             <h3>Cities</h3>
@@ -791,80 +1250,70 @@ def employees_page(data):
     with col1:
         if 'Title' in employees_df.columns:
             st.subheader("Employees by Title")
-            title_counts = employees_df['Title'].value_counts()
-            fig_title = px.pie(
-                values=title_counts.values,
-                names=title_counts.index,
-                title="Employee Distribution by Title",
-                hole=0.3
+            title_counts = aggregates['title_counts']
+            fig_title = pie_figure(
+                tuple(title_counts.index),
+                tuple(title_counts.values),
+                "Employee Distribution by Title",
+                height=400
             )
-            fig_title.update_layout(height=400)
             st.plotly_chart(fig_title, use_container_width=True)
     
     with col2:
         if 'Country' in employees_df.columns:
             st.subheader("Employees by Country")
-            country_counts = employees_df['Country'].value_counts()
-            # Create DataFrame for plotting
-            country_df = pd.DataFrame({
-                'Country': country_counts.index,
-                'Count': country_counts.values
-            })
-            fig_country = px.bar(
-                country_df,
-                x='Country',
-                y='Count',
-                title="Employees by Country",
-                labels={'Country': 'Country', 'Count': 'Number of Employees'},
-                color='Count',
-                color_continuous_scale='Blues'
+            country_counts = aggregates['country_counts']
+            fig_country = bar_figure(
+                tuple(country_counts.index),
+                tuple(country_counts.values),
+                "Employees by Country",
+                'Country',
+                'Number of Employees',
+                'Blues',
+                height=400
             )
-            fig_country.update_xaxes(tickangle=45)
-            fig_country.update_layout(height=400)
             st.plotly_chart(fig_country, use_container_width=True)
     
     # Employee performance (if orders data available)
-    if not data['orders'].empty and 'EmployeeID' in data['orders'].columns:
+    if 'employee_orders' in data['summaries']:
         st.subheader("Employee Performance")
         
-        # Count orders per employee
-        employee_orders = data['orders']['EmployeeID'].value_counts()
+        # Order counts per employee are precomputed at load
+        employee_orders = data['summaries']['employee_orders']
         
-        # Merge with employee names if available
-        if 'EmployeeID' in employees_df.columns and 'FirstName' in employees_df.columns and 'LastName' in employees_df.columns:
-            employees_df['FullName'] = employees_df['FirstName'] + ' ' + employees_df['LastName']
-            employee_performance = employee_orders.reset_index()
-            employee_performance.columns = ['EmployeeID', 'OrderCount']
-            employee_performance = employee_performance.merge(
-                employees_df[['EmployeeID', 'FullName']], 
-                on='EmployeeID', 
-                how='left'
-            )
+        # Look up the precomputed names of the filtered employees by id
+        if 'FullName' in employees_df.columns:
+            employee_names = employees_df.set_index('EmployeeID')['FullName']
             
-            fig_performance = px.bar(
-                employee_performance,
-                x='FullName',
-                y='OrderCount',
-                title="Orders Handled by Employee",
-                labels={'FullName': 'Employee', 'OrderCount': 'Number of Orders'},
-                color='OrderCount',
-                color_continuous_scale='Purples'
+            fig_performance = bar_figure(
+                tuple(employee_orders.index.map(employee_names)),
+                tuple(employee_orders.to_numpy()),
+                "Orders Handled by Employee",
+                'Employee',
+                'Number of Orders',
+                'Purples'
             )
-            fig_performance.update_xaxes(tickangle=45)
             st.plotly_chart(fig_performance, use_container_width=True)
     
     # Download section
     st.markdown("---")
     st.header("💾 Export Employee Data")
     
-    csv_data = employees_df.to_csv(index=False)
     st.download_button(
         label="📥 Download Employee Data (CSV)",
-        data=csv_data,
+        data=partial(to_csv_bytes, employees_df),
         file_name=f"employee_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
         mime="text/csv"
     )
 
+def select_relationship_filter(kind):
+    """Make the changed relationship dropdown the active filter and reset the others"""
+    key = f"relationship_filter_{kind}"
+    st.session_state['active_filter_kind'] = kind if st.session_state[key] != 'All' else None
+    for other in RELATIONSHIP_FILTER_KINDS:
+        if other != kind:
+            st.session_state[f"relationship_filter_{other}"] = 'All'
+
 def data_relationships_page(data):
     """Enhanced Data Relationships Page with comprehensive sidebar filters and detailed data display"""
     st.markdown('<h1 class="main-header">🔗 Advanced Data Relationships Dashboard</h1>', unsafe_allow_html=True)
@@ -884,54 +1333,40 @@ def data_relationships_page(data):
     # Sidebar Filters
     st.sidebar.header("🔍 Sidebar Filters")
     
-    # Get unique values for filters with names instead of IDs
-    if not data['orders'].empty:
-        order_options = ['All'] + [f"Order #{order_id}" for order_id in sorted(data['orders']['OrderID'].unique())]
-        order_id_map = {f"Order #{order_id}": order_id for order_id in data['orders']['OrderID'].unique()}
-    else:
-        order_options = ['All']
-        order_id_map = {}
-    
-    if not data['customers'].empty:
-        customer_options = ['All'] + [f"{row['CompanyName']} ({row['CustomerID']})" for _, row in data['customers'].iterrows()]
-        customer_id_map = {f"{row['CompanyName']} ({row['CustomerID']})": row['CustomerID'] for _, row in data['customers'].iterrows()}
-    else:
-        customer_options = ['All']
-        customer_id_map = {}
-    
-    if not data['employees'].empty:
-        employee_options = ['All'] + [f"{row['FirstName']} {row['LastName']} ({row['EmployeeID']})" for _, row in data['employees'].iterrows()]
-        employee_id_map = {f"{row['FirstName']} {row['LastName']} ({row['EmployeeID']})": row['EmployeeID'] for _, row in data['employees'].iterrows()}
-    else:
-        employee_options = ['All']
-        employee_id_map = {}
-    
-    if not data['products'].empty:
-        product_options = ['All'] + [f"{row['ProductName']} ({row['ProductID']})" for _, row in data['products'].iterrows()]
-        product_id_map = {f"{row['ProductName']} ({row['ProductID']})": row['ProductID'] for _, row in data['products'].iterrows()}
-    else:
-        product_options = ['All']
-        product_id_map = {}
-    
-    if not data['categories'].empty:
-        category_options = ['All'] + [f"{row['CategoryName']} ({row['CategoryID']})" for _, row in data['categories'].iterrows()]
-        category_id_map = {f"{row['CategoryName']} ({row['CategoryID']})": row['CategoryID'] for _, row in data['categories'].iterrows()}
-    else:
-        category_options = ['All']
-        category_id_map = {}
-    
-    # Filter dropdowns with user-friendly names
-    selected_order = st.sidebar.selectbox("📦 Order Number:", order_options)
-    selected_customer = st.sidebar.selectbox("👤 Customer Name:", customer_options)
-    selected_employee = st.sidebar.selectbox("👨‍💼 Employee Name:", employee_options)
-    selected_product = st.sidebar.selectbox("📦 Product Name:", product_options)
-    selected_category = st.sidebar.selectbox("🏷️ Category Name:", category_options)
+    # Dropdown ids and their display labels are built once per data load; the
+    # selectboxes return the selected id and format_func looks up its label
+    order_options, order_labels = data['options']['relationships']['orders']
+    customer_options, customer_labels = data['options']['relationships']['customers']
+    employee_options, employee_labels = data['options']['relationships']['employees']
+    product_options, product_labels = data['options']['relationships']['products']
+    category_options, category_labels = data['options']['relationships']['categories']
+    
+    # Filter dropdowns with user-friendly names; picking one resets the others
+    # so only the most recently chosen filter kind is ever active
+    selected_order = st.sidebar.selectbox(
+        "📦 Order Number:", order_options, format_func=order_labels.get,
+        key="relationship_filter_orders", on_change=select_relationship_filter, args=('orders',)
+    )
+    selected_customer = st.sidebar.selectbox(
+        "👤 Customer Name:", customer_options, format_func=customer_labels.get,
+        key="relationship_filter_customers", on_change=select_relationship_filter, args=('customers',)
+    )
+    selected_employee = st.sidebar.selectbox(
+        "👨‍💼 Employee Name:", employee_options, format_func=employee_labels.get,
+        key="relationship_filter_employees", on_change=select_relationship_filter, args=('employees',)
+    )
+    selected_product = st.sidebar.selectbox(
+        "📦 Product Name:", product_options, format_func=product_labels.get,
+        key="relationship_filter_products", on_change=select_relationship_filter, args=('products',)
+    )
+    selected_category = st.sidebar.selectbox(
+        "🏷️ Category Name:", category_options, format_func=category_labels.get,
+        key="relationship_filter_categories", on_change=select_relationship_filter, args=('categories',)
+    )
     
     # Date Range Filter
-    if not data['orders'].empty and 'OrderDate' in data['orders'].columns:
-        data['orders']['OrderDate'] = pd.to_datetime(data['orders']['OrderDate'], errors='coerce')
-        min_date = data['orders']['OrderDate'].min()
-        max_date = data['orders']['OrderDate'].max()
+    if 'order_date_range' in data['options']:
+        min_date, max_date = data['options']['order_date_range']
         
         if pd.notna(min_date) and pd.notna(max_date):
             date_range = st.sidebar.date_input(
@@ -949,19 +1384,19 @@ def data_relationships_page(data):
     active_filter = None
     if selected_order != 'All':
         active_filter = 'OrderID'
-        filter_value = order_id_map.get(selected_order, selected_order)
+        filter_value = selected_order
     elif selected_customer != 'All':
         active_filter = 'CustomerID'
-        filter_value = customer_id_map.get(selected_customer, selected_customer)
+        filter_value = selected_customer
     elif selected_employee != 'All':
         active_filter = 'EmployeeID'
-        filter_value = employee_id_map.get(selected_employee, selected_employee)
+        filter_value = selected_employee
     elif selected_product != 'All':
         active_filter = 'ProductID'
-        filter_value = product_id_map.get(selected_product, selected_product)
+        filter_value = selected_product
     elif selected_category != 'All':
         active_filter = 'CategoryID'
-        filter_value = category_id_map.get(selected_category, selected_category)
+        filter_value = selected_category
     elif date_range and len(date_range) == 2:
         active_filter = 'DateRange'
         filter_value = date_range
@@ -970,16 +1405,16 @@ def data_relationships_page(data):
     if active_filter:
         # Get display name for the selected filter
         display_name = filter_value
-        if active_filter == 'OrderID' and selected_order != 'All':
-            display_name = selected_order
-        elif active_filter == 'CustomerID' and selected_customer != 'All':
-            display_name = selected_customer
-        elif active_filter == 'EmployeeID' and selected_employee != 'All':
-            display_name = selected_employee
-        elif active_filter == 'ProductID' and selected_product != 'All':
-            display_name = selected_product
-        elif active_filter == 'CategoryID' and selected_category != 'All':
-            display_name = selected_category
+        if active_filter == 'OrderID':
+            display_name = order_labels[selected_order]
+        elif active_filter == 'CustomerID':
+            display_name = customer_labels[selected_customer]
+        elif active_filter == 'EmployeeID':
+            display_name = employee_labels[selected_employee]
+        elif active_filter == 'ProductID':
+            display_name = product_labels[selected_product]
+        elif active_filter == 'CategoryID':
+            display_name = category_labels[selected_category]
         elif active_filter == 'DateRange':
             display_name = f"{date_range[0]} to {date_range[1]}"
         
@@ -993,10 +1428,12 @@ def data_relationships_page(data):
             filtered_comprehensive = apply_filters_to_comprehensive_data(comprehensive_data, active_filter, filter_value)
             
             if not filtered_comprehensive.empty:
-                # Create tabs for organized display
-                tab1, tab2, tab3, tab4 = st.tabs(["📋 All Related Data", "📈 Analytics", "📊 Charts", "💾 Export"])
+                # Only the selected view is rendered; st.tabs would run all four
+                # bodies on every rerun, including the hidden charts and export
+                views = ["📋 All Related Data", "📈 Analytics", "📊 Charts", "💾 Export"]
+                active_view = st.segmented_control("View:", views, default=views[0], key="relationships_view") or views[0]
                 
-                with tab1:
+                if active_view == views[0]:
                     st.subheader("🔗 Complete Related Data View")
                     st.info(f"Showing all related data for {active_filter}: {display_name}")
                     
@@ -1006,7 +1443,11 @@ def data_relationships_page(data):
                         <h3 style="color: #2E86AB; margin-bottom: 1rem;">📊 Complete Data Table</h3>
                     </div>
                     """, unsafe_allow_html=True)
-                    st.dataframe(filtered_comprehensive, use_container_width=True)
+                    show_paginated_table(
+                        filtered_comprehensive,
+                        key=f"relationships_page_{active_filter}_{filter_value}",
+                        columns=DISPLAY_COLUMNS['comprehensive']
+                    )
                     
                     # Show data summary
                     col1, col2, col3 = st.columns(3)
@@ -1047,8 +1488,10 @@ def data_relationships_page(data):
                             product_columns = ['ProductID', 'ProductName']
                             if 'CategoryName' in filtered_comprehensive.columns:
                                 product_columns.append('CategoryName')
-                            if 'UnitPrice' in filtered_comprehensive.columns:
-                                product_columns.append('UnitPrice')
+                            # The product's catalog price; UnitPrice is the order-line
+                            # price and would list a product once per distinct sale price
+                            if 'ListPrice' in filtered_comprehensive.columns:
+                                product_columns.append('ListPrice')
                             
                             products_summary = filtered_comprehensive[product_columns].drop_duplicates()
                             st.dataframe(products_summary, use_container_width=True)
@@ -1065,15 +1508,15 @@ def data_relationships_page(data):
                             employees_summary = filtered_comprehensive[['EmployeeID', 'FirstName', 'LastName']].drop_duplicates()
                             st.dataframe(employees_summary, use_container_width=True)
                 
-                with tab2:
+                elif active_view == views[1]:
                     st.subheader("📈 Key Metrics & Analytics")
                     show_comprehensive_analytics(filtered_comprehensive, active_filter, filter_value)
                 
-                with tab3:
+                elif active_view == views[2]:
                     st.subheader("📊 Interactive Charts")
                     show_comprehensive_charts(filtered_comprehensive, active_filter, filter_value)
                 
-                with tab4:
+                else:
                     st.subheader("💾 Export Data")
                     show_comprehensive_export(filtered_comprehensive, active_filter, filter_value)
             else:
@@ -1091,7 +1534,7 @@ def data_relationships_page(data):
         
         if not comprehensive_data.empty:
             st.subheader("📊 Complete Dataset (All Tables Joined)")
-            st.dataframe(comprehensive_data, use_container_width=True)
+            show_paginated_table(comprehensive_data, key="relationships_page_all", columns=DISPLAY_COLUMNS['comprehensive'])
             
             # Show summary statistics
             col1, col2, col3 = st.columns(3)
@@ -1126,13 +1569,8 @@ def apply_filters_to_comprehensive_data(comprehensive_data, active_filter, filte
     elif active_filter == 'CategoryID':
         return comprehensive_data[comprehensive_data['CategoryID'] == filter_value]
     elif active_filter == 'DateRange':
-        start_date, end_date = filter_value
         if 'OrderDate' in comprehensive_data.columns:
-            comprehensive_data['OrderDate'] = pd.to_datetime(comprehensive_data['OrderDate'], errors='coerce')
-            return comprehensive_data[
-                (comprehensive_data['OrderDate'].dt.date >= start_date) &
-                (comprehensive_data['OrderDate'].dt.date <= end_date)
-            ]
+            return comprehensive_data[date_range_mask(comprehensive_data['OrderDate'], filter_value)]
     
     return comprehensive_data
 
@@ -1187,10 +1625,10 @@ def show_comprehensive_analytics(comprehensive_data, active_filter, filter_value
                         st.warning("Cannot calculate Revenue - missing UnitPrice or Quantity columns")
                         return
                 
-                category_summary = comprehensive_data.groupby('CategoryName').agg({
+                category_summary = comprehensive_data.groupby('CategoryName', observed=True).agg({
                     'Quantity': 'sum',
                     'Revenue': 'sum'
-                }).sort_values('Revenue', ascending=False).head(10)
+                }).nlargest(10, 'Revenue')
                 st.dataframe(category_summary, use_container_width=True)
             except Exception as e:
                 st.warning(f"Could not create category summary: {str(e)}")
@@ -1210,7 +1648,7 @@ def show_comprehensive_analytics(comprehensive_data, active_filter, filter_value
                 customer_summary = comprehensive_data.groupby('CustomerCompany').agg({
                     'Quantity': 'sum',
                     'Revenue': 'sum'
-                }).sort_values('Revenue', ascending=False).head(10)
+                }).nlargest(10, 'Revenue')
                 st.dataframe(customer_summary, use_container_width=True)
             except Exception as e:
                 st.warning(f"Could not create customer summary: {str(e)}")
@@ -1240,21 +1678,14 @@ def show_comprehensive_charts(comprehensive_data, active_filter, filter_value):
                         st.info("Cannot create revenue chart - missing UnitPrice or Quantity columns")
                         return
                 
-                category_revenue = comprehensive_data.groupby('CategoryName')['Revenue'].sum().sort_values(ascending=False)
-                fig = px.bar(
-                    x=category_revenue.index,
-                    y=category_revenue.values,
-                    title="💰 Revenue by Category",
-                    labels={'x': 'Category', 'y': 'Revenue ($)'},
-                    color=category_revenue.values,
-                    color_continuous_scale='Greens'
-                )
-                fig.update_layout(
-                    plot_bgcolor='white',
-                    paper_bgcolor='white',
-                    title_font_size=16,
-                    title_font_color='#2E86AB',
-                    xaxis_tickangle=-45
+                category_revenue = comprehensive_data.groupby('CategoryName', observed=True)['Revenue'].sum().sort_values(ascending=False)
+                fig = styled_bar_figure(
+                    tuple(category_revenue.index),
+                    tuple(category_revenue.values),
+                    "💰 Revenue by Category",
+                    'Category',
+                    'Revenue ($)',
+                    'Greens'
                 )
                 st.plotly_chart(fig, use_container_width=True)
             except Exception as e:
@@ -1263,21 +1694,14 @@ def show_comprehensive_charts(comprehensive_data, active_filter, filter_value):
     with col2:
         # Quantity by product
         if 'ProductName' in comprehensive_data.columns and 'Quantity' in comprehensive_data.columns:
-            product_quantity = comprehensive_data.groupby('ProductName')['Quantity'].sum().sort_values(ascending=False).head(10)
-            fig = px.bar(
-                x=product_quantity.index,
-                y=product_quantity.values,
-                title="📦 Top 10 Products by Quantity",
-                labels={'x': 'Product', 'y': 'Quantity'},
-                color=product_quantity.values,
-                color_continuous_scale='Blues'
-            )
-            fig.update_layout(
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                title_font_size=16,
-                title_font_color='#2E86AB',
-                xaxis_tickangle=-45
+            product_quantity = comprehensive_data.groupby('ProductName')['Quantity'].sum().nlargest(10)
+            fig = styled_bar_figure(
+                tuple(product_quantity.index),
+                tuple(product_quantity.values),
+                "📦 Top 10 Products by Quantity",
+                'Product',
+                'Quantity',
+                'Blues'
             )
             st.plotly_chart(fig, use_container_width=True)
     
@@ -1287,9 +1711,7 @@ def show_comprehensive_charts(comprehensive_data, active_filter, filter_value):
         # Orders over time
         if 'OrderDate' in comprehensive_data.columns:
             try:
-                comprehensive_data['OrderDate'] = pd.to_datetime(comprehensive_data['OrderDate'], errors='coerce')
                 orders_by_date = comprehensive_data.groupby(comprehensive_data['OrderDate'].dt.date).size().reset_index(name='Orders')
-                orders_by_date['OrderDate'] = pd.to_datetime(orders_by_date['OrderDate']).dt.date
                 
                 fig = px.line(
                     orders_by_date,
@@ -1326,7 +1748,6 @@ def show_comprehensive_charts(comprehensive_data, active_filter, filter_value):
                         return
                 
                 revenue_by_date = comprehensive_data.groupby(comprehensive_data['OrderDate'].dt.date)['Revenue'].sum().reset_index()
-                revenue_by_date['OrderDate'] = pd.to_datetime(revenue_by_date['OrderDate']).dt.date
                 
                 fig = px.line(
                     revenue_by_date,
@@ -1359,97 +1780,33 @@ def show_comprehensive_export(comprehensive_data, active_filter, filter_value):
     st.subheader("📊 Export Comprehensive Data")
     
     # Export full comprehensive data
-    csv_data = comprehensive_data.to_csv(index=False)
     st.download_button(
         label="📥 Download Complete Data (CSV)",
-        data=csv_data,
+        data=partial(to_csv_bytes, comprehensive_data),
         file_name=f"comprehensive_data_{active_filter}_{filter_value}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
         mime="text/csv"
     )
     
     # Export summary data
     if 'CategoryName' in comprehensive_data.columns and 'Revenue' in comprehensive_data.columns:
-        category_summary = comprehensive_data.groupby('CategoryName').agg({
+        category_summary = comprehensive_data.groupby('CategoryName', observed=True).agg({
             'Quantity': 'sum',
             'Revenue': 'sum'
         }).reset_index()
         
-        csv_summary = category_summary.to_csv(index=False)
         st.download_button(
             label="📥 Download Category Summary (CSV)",
-            data=csv_summary,
+            data=partial(to_csv_bytes, category_summary),
             file_name=f"category_summary_{active_filter}_{filter_value}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
             mime="text/csv"
         )
 
 def create_comprehensive_dataset(data):
-    """Create comprehensive dataset using your exact SQL query logic"""
-    try:
-        # Start with Orders and Order Details (RIGHT JOIN)
-        if data['orders'].empty or data['orderdetails'].empty:
-            return pd.DataFrame()
-        
-        # RIGHT JOIN Orders with Order Details
-        comprehensive = data['orderdetails'].merge(
-            data['orders'],
-            left_on='OrderID',
-            right_on='OrderID',
-            how='right'
-        )
-        
-        # LEFT JOIN with Products
-        if not data['products'].empty:
-            comprehensive = comprehensive.merge(
-                data['products'],
-                left_on='ProductID',
-                right_on='ProductID',
-                how='left'
-            )
-        
-        # JOIN with Customers
-        if not data['customers'].empty:
-            comprehensive = comprehensive.merge(
-                data['customers'],
-                left_on='CustomerID',
-                right_on='CustomerID',
-                how='inner'
-            )
-        
-        # JOIN with Categories
-        if not data['categories'].empty and 'CategoryID' in comprehensive.columns:
-            comprehensive = comprehensive.merge(
-                data['categories'],
-                left_on='CategoryID',
-                right_on='CategoryID',
-                how='inner'
-            )
-        
-        # JOIN with Employees
-        if not data['employees'].empty:
-            comprehensive = comprehensive.merge(
-                data['employees'],
-                left_on='EmployeeID',
-                right_on='EmployeeID',
-                how='inner'
-            )
-        
-        # Keep all important columns from the joined dataset
-        # We'll keep all columns that exist in the comprehensive dataset
-        # This ensures we have all the data needed for charts and analytics
-        
-        # Rename CompanyName to CustomerCompany to match your query
-        if 'CompanyName' in comprehensive.columns:
-            comprehensive = comprehensive.rename(columns={'CompanyName': 'CustomerCompany'})
-        
-        # Calculate Revenue
-        if 'UnitPrice' in comprehensive.columns and 'Quantity' in comprehensive.columns:
-            comprehensive['Revenue'] = comprehensive['UnitPrice'] * comprehensive['Quantity']
-        
-        return comprehensive
-        
-    except Exception as e:
-        st.error(f"Error in create_comprehensive_dataset: {str(e)}")
+    """Return the comprehensive dataset (Orders, Order Details, Products, Customers,
+    Categories and Employees) joined by SQL Server in load_all_data"""
+    if data['orders'].empty or data['orderdetails'].empty:
         return pd.DataFrame()
+    return data['comprehensive']
 
 def show_customer_relationships(data, customer_id):
     """Show all data related to a specific customer"""
@@ -1459,7 +1816,7 @@ def show_customer_relationships(data, customer_id):
     customer = data['customers'][data['customers']['CustomerID'] == customer_id]
     if not customer.empty:
         st.markdown("**Customer Information:**")
-        st.json(customer.iloc[0].to_dict())
+        render_key_values(customer.iloc[0])
     
     # Customer's orders
     customer_orders = data['orders'][data['orders']['CustomerID'] == customer_id]
@@ -1468,8 +1825,8 @@ def show_customer_relationships(data, customer_id):
         st.dataframe(customer_orders, use_container_width=True, hide_index=True)
         
         # Order details for this customer
-        order_ids = customer_orders['OrderID'].tolist()
-        if order_ids and not data['orderdetails'].empty:
+        order_ids = customer_orders['OrderID'].unique()
+        if len(order_ids) > 0 and not data['orderdetails'].empty:
             customer_order_details = data['orderdetails'][data['orderdetails']['OrderID'].isin(order_ids)]
             if not customer_order_details.empty:
                 st.markdown(f"**Order Details ({len(customer_order_details)}):**")
@@ -1483,7 +1840,7 @@ def show_order_relationships(data, order_id):
     order = data['orders'][data['orders']['OrderID'] == order_id]
     if not order.empty:
         st.markdown("**Order Information:**")
-        st.json(order.iloc[0].to_dict())
+        render_key_values(order.iloc[0])
     
     # Customer who placed the order
     if not order.empty and 'CustomerID' in order.columns:
@@ -1491,7 +1848,7 @@ def show_order_relationships(data, order_id):
         customer = data['customers'][data['customers']['CustomerID'] == customer_id]
         if not customer.empty:
             st.markdown("**Customer Information:**")
-            st.json(customer.iloc[0].to_dict())
+            render_key_values(customer.iloc[0])
     
     # Employee who handled the order
     if not order.empty and 'EmployeeID' in order.columns:
@@ -1499,7 +1856,7 @@ def show_order_relationships(data, order_id):
         employee = data['employees'][data['employees']['EmployeeID'] == employee_id]
         if not employee.empty:
             st.markdown("**Employee Information:**")
-            st.json(employee.iloc[0].to_dict())
+            render_key_values(employee.iloc[0][DISPLAY_COLUMNS['employees']])
     
     # Order details
     order_details = data['orderdetails'][data['orderdetails']['OrderID'] == order_id]
@@ -1508,8 +1865,8 @@ def show_order_relationships(data, order_id):
         st.dataframe(order_details, use_container_width=True, hide_index=True)
         
         # Product information for order details
-        product_ids = order_details['ProductID'].tolist()
-        if product_ids and not data['products'].empty:
+        product_ids = order_details['ProductID'].unique()
+        if len(product_ids) > 0 and not data['products'].empty:
             products = data['products'][data['products']['ProductID'].isin(product_ids)]
             if not products.empty:
                 st.markdown("**Products in this Order:**")
@@ -1523,7 +1880,7 @@ def show_product_relationships(data, product_id):
     product = data['products'][data['products']['ProductID'] == product_id]
     if not product.empty:
         st.markdown("**Product Information:**")
-        st.json(product.iloc[0].to_dict())
+        render_key_values(product.iloc[0])
     
     # Category information
     if not product.empty and 'CategoryID' in product.columns:
@@ -1531,7 +1888,7 @@ def show_product_relationships(data, product_id):
         category = data['categories'][data['categories']['CategoryID'] == category_id]
         if not category.empty:
             st.markdown("**Category Information:**")
-            st.json(category.iloc[0].to_dict())
+            render_key_values(category.iloc[0])
     
     # Order details for this product
     product_order_details = data['orderdetails'][data['orderdetails']['ProductID'] == product_id]
@@ -1540,8 +1897,8 @@ def show_product_relationships(data, product_id):
         st.dataframe(product_order_details, use_container_width=True, hide_index=True)
         
         # Orders that contain this product
-        order_ids = product_order_details['OrderID'].tolist()
-        if order_ids and not data['orders'].empty:
+        order_ids = product_order_details['OrderID'].unique()
+        if len(order_ids) > 0 and not data['orders'].empty:
             orders = data['orders'][data['orders']['OrderID'].isin(order_ids)]
             if not orders.empty:
                 st.markdown("**Orders containing this Product:**")
@@ -1555,7 +1912,7 @@ def show_category_relationships(data, category_id):
     category = data['categories'][data['categories']['CategoryID'] == category_id]
     if not category.empty:
         st.markdown("**Category Information:**")
-        st.json(category.iloc[0].to_dict())
+        render_key_values(category.iloc[0])
     
     # Products in this category
     category_products = data['products'][data['products']['CategoryID'] == category_id]
@@ -1564,8 +1921,8 @@ def show_category_relationships(data, category_id):
         st.dataframe(category_products, use_container_width=True, hide_index=True)
         
         # Order details for products in this category
-        product_ids = category_products['ProductID'].tolist()
-        if product_ids and not data['orderdetails'].empty:
+        product_ids = category_products['ProductID'].unique()
+        if len(product_ids) > 0 and not data['orderdetails'].empty:
             category_order_details = data['orderdetails'][data['orderdetails']['ProductID'].isin(product_ids)]
             if not category_order_details.empty:
                 st.markdown(f"**Order Details for Products in this Category ({len(category_order_details)}):**")
@@ -1579,7 +1936,7 @@ def show_employee_relationships(data, employee_id):
     employee = data['employees'][data['employees']['EmployeeID'] == employee_id]
     if not employee.empty:
         st.markdown("**Employee Information:**")
-        st.json(employee.iloc[0].to_dict())
+        render_key_values(employee.iloc[0][DISPLAY_COLUMNS['employees']])
     
     # Orders handled by this employee
     employee_orders = data['orders'][data['orders']['EmployeeID'] == employee_id]
@@ -1602,7 +1959,7 @@ def show_customer_detailed_relationships(data, customer_id):
     
     if not customer.empty:
         with st.expander("👤 Customer Details", expanded=True):
-            st.json(customer.iloc[0].to_dict())
+            render_key_values(customer.iloc[0])
     
     # Customer's orders
     customer_orders = data['orders'][data['orders']['CustomerID'] == customer_id]
@@ -1611,8 +1968,8 @@ def show_customer_detailed_relationships(data, customer_id):
             st.dataframe(customer_orders, use_container_width=True, hide_index=True)
             
             # Order details for this customer
-            order_ids = customer_orders['OrderID'].tolist()
-            if order_ids and not data['orderdetails'].empty:
+            order_ids = customer_orders['OrderID'].unique()
+            if len(order_ids) > 0 and not data['orderdetails'].empty:
                 customer_order_details = data['orderdetails'][data['orderdetails']['OrderID'].isin(order_ids)]
                 if not customer_order_details.empty:
                     st.subheader("Order Details")
@@ -1631,24 +1988,23 @@ def show_order_detailed_relationships(data, order_id):
     order = data['orders'][data['orders']['OrderID'] == order_id]
     
     if not order.empty:
+        order_row = order.iloc[0]
         with st.expander("📦 Order Details", expanded=True):
-            st.json(order.iloc[0].to_dict())
+            render_key_values(order_row)
         
         # Customer who placed the order
         if 'CustomerID' in order.columns:
-            customer_id = order.iloc[0]['CustomerID']
-            customer = data['customers'][data['customers']['CustomerID'] == customer_id]
+            customer = data['customers'][data['customers']['CustomerID'] == order_row['CustomerID']]
             if not customer.empty:
                 with st.expander("👤 Customer Information", expanded=True):
-                    st.json(customer.iloc[0].to_dict())
+                    render_key_values(customer.iloc[0])
         
         # Employee who handled the order
         if 'EmployeeID' in order.columns:
-            employee_id = order.iloc[0]['EmployeeID']
-            employee = data['employees'][data['employees']['EmployeeID'] == employee_id]
+            employee = data['employees'][data['employees']['EmployeeID'] == order_row['EmployeeID']]
             if not employee.empty:
                 with st.expander("👨‍💼 Employee Information", expanded=True):
-                    st.json(employee.iloc[0].to_dict())
+                    render_key_values(employee.iloc[0][DISPLAY_COLUMNS['employees']])
         
         # Order details
         order_details = data['orderdetails'][data['orderdetails']['OrderID'] == order_id]
@@ -1657,8 +2013,8 @@ def show_order_detailed_relationships(data, order_id):
                 st.dataframe(order_details, use_container_width=True, hide_index=True)
                 
                 # Product information for order details
-                product_ids = order_details['ProductID'].tolist()
-                if product_ids and not data['products'].empty:
+                product_ids = order_details['ProductID'].unique()
+                if len(product_ids) > 0 and not data['products'].empty:
                     products = data['products'][data['products']['ProductID'].isin(product_ids)]
                     if not products.empty:
                         st.subheader("Products in this Order")
@@ -1670,7 +2026,7 @@ def show_employee_detailed_relationships(data, employee_id):
     
     if not employee.empty:
         with st.expander("👨‍💼 Employee Details", expanded=True):
-            st.json(employee.iloc[0].to_dict())
+            render_key_values(employee.iloc[0][DISPLAY_COLUMNS['employees']])
     
     # Orders handled by this employee
     employee_orders = data['orders'][data['orders']['EmployeeID'] == employee_id]
@@ -1687,8 +2043,8 @@ def show_employee_detailed_relationships(data, employee_id):
                     st.dataframe(customers, use_container_width=True, hide_index=True)
             
             # Products sold by this employee
-            order_ids = employee_orders['OrderID'].tolist()
-            if order_ids and not data['orderdetails'].empty:
+            order_ids = employee_orders['OrderID'].unique()
+            if len(order_ids) > 0 and not data['orderdetails'].empty:
                 employee_order_details = data['orderdetails'][data['orderdetails']['OrderID'].isin(order_ids)]
                 if not employee_order_details.empty:
                     st.subheader("Order Details")
@@ -1707,7 +2063,7 @@ def show_product_detailed_relationships(data, product_id):
     
     if not product.empty:
         with st.expander("📦 Product Details", expanded=True):
-            st.json(product.iloc[0].to_dict())
+            render_key_values(product.iloc[0])
         
         # Category information
         if 'CategoryID' in product.columns:
@@ -1715,7 +2071,7 @@ def show_product_detailed_relationships(data, product_id):
             category = data['categories'][data['categories']['CategoryID'] == category_id]
             if not category.empty:
                 with st.expander("🏷️ Category Information", expanded=True):
-                    st.json(category.iloc[0].to_dict())
+                    render_key_values(category.iloc[0])
         
         # Order details for this product
         product_order_details = data['orderdetails'][data['orderdetails']['ProductID'] == product_id]
@@ -1724,8 +2080,8 @@ def show_product_detailed_relationships(data, product_id):
                 st.dataframe(product_order_details, use_container_width=True, hide_index=True)
                 
                 # Orders that contain this product
-                order_ids = product_order_details['OrderID'].tolist()
-                if order_ids and not data['orders'].empty:
+                order_ids = product_order_details['OrderID'].unique()
+                if len(order_ids) > 0 and not data['orders'].empty:
                     orders = data['orders'][data['orders']['OrderID'].isin(order_ids)]
                     if not orders.empty:
                         st.subheader("Orders containing this Product")
@@ -1745,7 +2101,7 @@ def show_category_detailed_relationships(data, category_id):
     
     if not category.empty:
         with st.expander("🏷️ Category Details", expanded=True):
-            st.json(category.iloc[0].to_dict())
+            render_key_values(category.iloc[0])
     
     # Products in this category
     category_products = data['products'][data['products']['CategoryID'] == category_id]
@@ -1754,8 +2110,8 @@ def show_category_detailed_relationships(data, category_id):
             st.dataframe(category_products, use_container_width=True, hide_index=True)
             
             # Order details for products in this category
-            product_ids = category_products['ProductID'].tolist()
-            if product_ids and not data['orderdetails'].empty:
+            product_ids = category_products['ProductID'].unique()
+            if len(product_ids) > 0 and not data['orderdetails'].empty:
                 category_order_details = data['orderdetails'][data['orderdetails']['ProductID'].isin(product_ids)]
                 if not category_order_details.empty:
                     st.subheader("Order Details for Products in this Category")
@@ -1771,23 +2127,17 @@ def show_category_detailed_relationships(data, category_id):
 
 def show_date_range_relationships(data, date_range):
     """Show relationships for a specific date range"""
-    start_date, end_date = date_range
-    
     # Filter orders by date range
     if not data['orders'].empty and 'OrderDate' in data['orders'].columns:
-        data['orders']['OrderDate'] = pd.to_datetime(data['orders']['OrderDate'], errors='coerce')
-        date_filtered_orders = data['orders'][
-            (data['orders']['OrderDate'].dt.date >= start_date) &
-            (data['orders']['OrderDate'].dt.date <= end_date)
-        ]
+        date_filtered_orders = data['orders'][date_range_mask(data['orders']['OrderDate'], date_range)]
         
         if not date_filtered_orders.empty:
             with st.expander(f"📦 Orders in Date Range ({len(date_filtered_orders)})", expanded=True):
                 st.dataframe(date_filtered_orders, use_container_width=True, hide_index=True)
                 
                 # Order details for this date range
-                order_ids = date_filtered_orders['OrderID'].tolist()
-                if order_ids and not data['orderdetails'].empty:
+                order_ids = date_filtered_orders['OrderID'].unique()
+                if len(order_ids) > 0 and not data['orderdetails'].empty:
                     date_order_details = data['orderdetails'][data['orderdetails']['OrderID'].isin(order_ids)]
                     if not date_order_details.empty:
                         st.subheader("Order Details in Date Range")
@@ -1809,6 +2159,11 @@ def show_date_range_relationships(data, date_range):
                                 st.subheader("Customers who Ordered in Date Range")
                                 st.dataframe(customers, use_container_width=True, hide_index=True)
 
+def discount_labels(discounts):
+    """Pie slice labels for discount levels, e.g. '5%' or 'No Discount'"""
+    percents = (discounts * 100).round().astype(int).astype(str) + '%'
+    return np.where(discounts > 0, percents, 'No Discount')
+
 def show_analytics_for_filter(data, active_filter, filter_value):
     """Show analytics and metrics for the selected filter"""
     if active_filter == 'CustomerID':
@@ -1837,7 +2192,8 @@ def show_analytics_for_filter(data, active_filter, filter_value):
             with col3:
                 st.metric("Ship City", order.iloc[0].get('ShipCity', 'N/A'))
             with col4:
-                st.metric("Order Date", order.iloc[0].get('OrderDate', 'N/A'))
+                order_date = order.iloc[0].get('OrderDate')
+                st.metric("Order Date", order_date.strftime('%Y-%m-%d') if pd.notna(order_date) else 'N/A')
     
     elif active_filter == 'EmployeeID':
         # Employee analytics
@@ -1861,7 +2217,7 @@ def show_analytics_for_filter(data, active_filter, filter_value):
             with col1:
                 st.metric("Total Quantity Sold", product_orders['Quantity'].sum())
             with col2:
-                st.metric("Total Revenue", f"${(product_orders['UnitPrice'] * product_orders['Quantity']).sum():,.2f}")
+                st.metric("Total Revenue", f"${product_orders['LineRevenue'].sum():,.2f}")
             with col3:
                 st.metric("Orders Containing Product", product_orders['OrderID'].nunique())
             with col4:
@@ -1879,7 +2235,7 @@ def show_analytics_for_filter(data, active_filter, filter_value):
             with col3:
                 st.metric("Total Stock", category_products['UnitsInStock'].sum())
             with col4:
-                st.metric("Discontinued Products", len(category_products[category_products['Discontinued'] == True]))
+                st.metric("Discontinued Products", np.count_nonzero(category_products['Discontinued'].fillna(False).to_numpy(dtype=bool)))
 
 def show_charts_for_filter(data, active_filter, filter_value):
     """Show beautiful and informative interactive charts for the selected filter"""
@@ -1899,9 +2255,7 @@ def show_charts_for_filter(data, active_filter, filter_value):
             with col1:
                 # Enhanced Orders over time with better styling
                 if 'OrderDate' in customer_orders.columns:
-                    customer_orders['OrderDate'] = pd.to_datetime(customer_orders['OrderDate'], errors='coerce')
-                    orders_by_date = customer_orders.groupby(customer_orders['OrderDate'].dt.date).size().reset_index(name='Orders')
-                    orders_by_date['OrderDate'] = pd.to_datetime(orders_by_date['OrderDate']).dt.date
+                    orders_by_date = customer_orders.groupby(customer_orders['OrderDate'].dt.normalize()).size().reset_index(name='Orders')
                     
                     fig = px.line(
                         orders_by_date, 
@@ -1924,7 +2278,7 @@ def show_charts_for_filter(data, active_filter, filter_value):
             
             with col2:
                 # Enhanced Orders by ship country with better styling
-                country_counts = customer_orders['ShipCountry'].value_counts()
+                country_counts = count_values(customer_orders['ShipCountry'])
                 fig = px.pie(
                     values=country_counts.values, 
                     names=country_counts.index, 
@@ -1946,11 +2300,10 @@ def show_charts_for_filter(data, active_filter, filter_value):
             with col3:
                 # Customer order value distribution
                 if not data['orderdetails'].empty:
-                    customer_order_ids = customer_orders['OrderID'].tolist()
+                    customer_order_ids = customer_orders['OrderID'].to_numpy()
                     customer_order_details = data['orderdetails'][data['orderdetails']['OrderID'].isin(customer_order_ids)]
                     if not customer_order_details.empty:
-                        customer_order_details['OrderValue'] = customer_order_details['UnitPrice'] * customer_order_details['Quantity']
-                        order_values = customer_order_details.groupby('OrderID')['OrderValue'].sum()
+                        order_values = customer_order_details.groupby('OrderID')['LineRevenue'].sum()
                         
                         fig = px.histogram(
                             x=order_values.values,
@@ -2003,7 +2356,7 @@ def show_charts_for_filter(data, active_filter, filter_value):
             
             with col1:
                 # Enhanced Top customers with better styling
-                customer_counts = employee_orders['CustomerID'].value_counts().head(10)
+                customer_counts = count_values(employee_orders['CustomerID'], top=10)
                 customer_df = pd.DataFrame({
                     'Customer': customer_counts.index,
                     'Orders': customer_counts.values
@@ -2030,7 +2383,7 @@ def show_charts_for_filter(data, active_filter, filter_value):
             
             with col2:
                 # Enhanced Orders by ship country
-                country_counts = employee_orders['ShipCountry'].value_counts()
+                country_counts = count_values(employee_orders['ShipCountry'])
                 fig = px.pie(
                     values=country_counts.values, 
                     names=country_counts.index, 
@@ -2052,9 +2405,7 @@ def show_charts_for_filter(data, active_filter, filter_value):
             with col3:
                 # Employee performance over time
                 if 'OrderDate' in employee_orders.columns:
-                    employee_orders['OrderDate'] = pd.to_datetime(employee_orders['OrderDate'], errors='coerce')
-                    performance_by_date = employee_orders.groupby(employee_orders['OrderDate'].dt.date).size().reset_index(name='Orders')
-                    performance_by_date['OrderDate'] = pd.to_datetime(performance_by_date['OrderDate']).dt.date
+                    performance_by_date = employee_orders.groupby(employee_orders['OrderDate'].dt.normalize()).size().reset_index(name='Orders')
                     
                     fig = px.line(
                         performance_by_date,
@@ -2077,15 +2428,14 @@ def show_charts_for_filter(data, active_filter, filter_value):
             with col4:
                 # Revenue generated by employee
                 if not data['orderdetails'].empty:
-                    employee_order_ids = employee_orders['OrderID'].tolist()
+                    employee_order_ids = employee_orders['OrderID'].to_numpy()
                     employee_order_details = data['orderdetails'][data['orderdetails']['OrderID'].isin(employee_order_ids)]
                     if not employee_order_details.empty:
-                        employee_order_details['Revenue'] = employee_order_details['UnitPrice'] * employee_order_details['Quantity']
                         monthly_revenue = employee_order_details.merge(
                             employee_orders[['OrderID', 'OrderDate']], on='OrderID', how='left'
                         )
-                        monthly_revenue['Month'] = pd.to_datetime(monthly_revenue['OrderDate']).dt.strftime('%Y-%m')
-                        revenue_by_month = monthly_revenue.groupby('Month')['Revenue'].sum().reset_index()
+                        monthly_revenue['Month'] = monthly_revenue['OrderDate'].dt.strftime('%Y-%m')
+                        revenue_by_month = monthly_revenue.groupby('Month')['LineRevenue'].sum().reset_index(name='Revenue')
                         
                         fig = px.bar(
                             revenue_by_month,
@@ -2119,9 +2469,7 @@ def show_charts_for_filter(data, active_filter, filter_value):
                     order_dates = data['orders'][['OrderID', 'OrderDate']]
                     product_with_dates = product_orders.merge(order_dates, on='OrderID', how='left')
                     if 'OrderDate' in product_with_dates.columns:
-                        product_with_dates['OrderDate'] = pd.to_datetime(product_with_dates['OrderDate'], errors='coerce')
-                        quantity_by_date = product_with_dates.groupby(product_with_dates['OrderDate'].dt.date)['Quantity'].sum().reset_index()
-                        quantity_by_date['OrderDate'] = pd.to_datetime(quantity_by_date['OrderDate']).dt.date
+                        quantity_by_date = product_with_dates.groupby(product_with_dates['OrderDate'].dt.normalize())['Quantity'].sum().reset_index()
                         
                         fig = px.line(
                             quantity_by_date,
@@ -2143,10 +2491,9 @@ def show_charts_for_filter(data, active_filter, filter_value):
             
             with col2:
                 # Enhanced Revenue by order
-                product_orders['Revenue'] = product_orders['UnitPrice'] * product_orders['Quantity']
-                revenue_by_order = product_orders.groupby('OrderID')['Revenue'].sum().sort_values(ascending=False).head(10)
+                revenue_by_order = product_orders.groupby('OrderID')['LineRevenue'].sum().nlargest(10)
                 revenue_df = pd.DataFrame({
-                    'Order': [f"Order #{order_id}" for order_id in revenue_by_order.index],
+                    'Order': 'Order #' + revenue_by_order.index.astype(str),
                     'Revenue': revenue_by_order.values
                 })
                 
@@ -2178,7 +2525,7 @@ def show_charts_for_filter(data, active_filter, filter_value):
                     discount_analysis = product_orders.groupby('Discount')['Quantity'].sum().reset_index()
                     fig = px.pie(
                         values=discount_analysis['Quantity'],
-                        names=[f"{disc*100:.0f}%" if disc > 0 else "No Discount" for disc in discount_analysis['Discount']],
+                        names=discount_labels(discount_analysis['Discount']),
                         title="🎯 Sales by Discount Level",
                         color_discrete_sequence=colors
                     )
@@ -2243,7 +2590,7 @@ def show_charts_for_filter(data, active_filter, filter_value):
                 # Products by unit price
                 fig = px.pie(
                     values=order_details['UnitPrice'],
-                    names=[f"Product {pid}" for pid in order_details['ProductID']],
+                    names='Product ' + order_details['ProductID'].astype(str),
                     title="💰 Product Price Distribution",
                     color_discrete_sequence=colors
                 )
@@ -2261,8 +2608,7 @@ def show_charts_for_filter(data, active_filter, filter_value):
             
             with col3:
                 # Order value breakdown
-                order_details['ItemValue'] = order_details['UnitPrice'] * order_details['Quantity']
-                total_order_value = order_details['ItemValue'].sum()
+                total_order_value = order_details['LineRevenue'].sum()
                 
                 fig = px.bar(
                     x=['Total Order Value'],
@@ -2288,7 +2634,7 @@ def show_charts_for_filter(data, active_filter, filter_value):
                     discount_analysis = order_details.groupby('Discount')['Quantity'].sum().reset_index()
                     fig = px.pie(
                         values=discount_analysis['Quantity'],
-                        names=[f"{disc*100:.0f}%" if disc > 0 else "No Discount" for disc in discount_analysis['Discount']],
+                        names=discount_labels(discount_analysis['Discount']),
                         title="🎯 Quantity by Discount Level",
                         color_discrete_sequence=colors
                     )
@@ -2353,11 +2699,10 @@ def show_charts_for_filter(data, active_filter, filter_value):
             with col3:
                 # Category sales performance (if order details available)
                 if not data['orderdetails'].empty:
-                    category_product_ids = category_products['ProductID'].tolist()
+                    category_product_ids = category_products['ProductID'].to_numpy()
                     category_sales = data['orderdetails'][data['orderdetails']['ProductID'].isin(category_product_ids)]
                     if not category_sales.empty:
-                        category_sales['Revenue'] = category_sales['UnitPrice'] * category_sales['Quantity']
-                        product_sales = category_sales.groupby('ProductID')['Revenue'].sum().reset_index()
+                        product_sales = category_sales.groupby('ProductID')['LineRevenue'].sum().reset_index(name='Revenue')
                         product_sales = product_sales.merge(category_products[['ProductID', 'ProductName']], on='ProductID', how='left')
                         
                         fig = px.bar(
@@ -2405,13 +2750,8 @@ def show_charts_for_filter(data, active_filter, filter_value):
     
     elif active_filter == 'DateRange':
         # Date range charts
-        start_date, end_date = filter_value
         if not data['orders'].empty and 'OrderDate' in data['orders'].columns:
-            data['orders']['OrderDate'] = pd.to_datetime(data['orders']['OrderDate'], errors='coerce')
-            date_filtered_orders = data['orders'][
-                (data['orders']['OrderDate'].dt.date >= start_date) &
-                (data['orders']['OrderDate'].dt.date <= end_date)
-            ]
+            date_filtered_orders = data['orders'][date_range_mask(data['orders']['OrderDate'], filter_value)]
             
             if not date_filtered_orders.empty:
                 st.subheader("📅 Date Range Analysis")
@@ -2420,8 +2760,7 @@ def show_charts_for_filter(data, active_filter, filter_value):
                 
                 with col1:
                     # Orders over time in date range
-                    orders_by_date = date_filtered_orders.groupby(date_filtered_orders['OrderDate'].dt.date).size().reset_index(name='Orders')
-                    orders_by_date['OrderDate'] = pd.to_datetime(orders_by_date['OrderDate']).dt.date
+                    orders_by_date = date_filtered_orders.groupby(date_filtered_orders['OrderDate'].dt.normalize()).size().reset_index(name='Orders')
                     
                     fig = px.line(
                         orders_by_date,
@@ -2443,7 +2782,7 @@ def show_charts_for_filter(data, active_filter, filter_value):
                 
                 with col2:
                     # Orders by ship country in date range
-                    country_counts = date_filtered_orders['ShipCountry'].value_counts()
+                    country_counts = count_values(date_filtered_orders['ShipCountry'])
                     fig = px.pie(
                         values=country_counts.values,
                         names=country_counts.index,
@@ -2490,15 +2829,13 @@ def show_charts_for_filter(data, active_filter, filter_value):
                 with col4:
                     # Revenue analysis for date range
                     if not data['orderdetails'].empty:
-                        date_order_ids = date_filtered_orders['OrderID'].tolist()
+                        date_order_ids = date_filtered_orders['OrderID'].to_numpy()
                         date_order_details = data['orderdetails'][data['orderdetails']['OrderID'].isin(date_order_ids)]
                         if not date_order_details.empty:
-                            date_order_details['Revenue'] = date_order_details['UnitPrice'] * date_order_details['Quantity']
                             daily_revenue = date_order_details.merge(
                                 date_filtered_orders[['OrderID', 'OrderDate']], on='OrderID', how='left'
                             )
-                            daily_revenue = daily_revenue.groupby(daily_revenue['OrderDate'].dt.date)['Revenue'].sum().reset_index()
-                            daily_revenue['OrderDate'] = pd.to_datetime(daily_revenue['OrderDate']).dt.date
+                            daily_revenue = daily_revenue.groupby(daily_revenue['OrderDate'].dt.normalize())['LineRevenue'].sum().reset_index(name='Revenue')
                             
                             fig = px.line(
                                 daily_revenue,
@@ -2526,10 +2863,9 @@ def show_export_options(data, active_filter, filter_value):
         # Export customer-related data
         customer_orders = data['orders'][data['orders']['CustomerID'] == filter_value]
         if not customer_orders.empty:
-            csv_data = customer_orders.to_csv(index=False)
             st.download_button(
                 label="📥 Download Customer Orders (CSV)",
-                data=csv_data,
+                data=partial(to_csv_bytes, customer_orders),
                 file_name=f"customer_{filter_value}_orders_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv"
             )
@@ -2538,10 +2874,9 @@ def show_export_options(data, active_filter, filter_value):
         # Export order-related data
         order_details = data['orderdetails'][data['orderdetails']['OrderID'] == filter_value]
         if not order_details.empty:
-            csv_data = order_details.to_csv(index=False)
             st.download_button(
                 label="📥 Download Order Details (CSV)",
-                data=csv_data,
+                data=partial(to_csv_bytes, order_details),
                 file_name=f"order_{filter_value}_details_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv"
             )
@@ -2550,10 +2885,9 @@ def show_export_options(data, active_filter, filter_value):
         # Export employee-related data
         employee_orders = data['orders'][data['orders']['EmployeeID'] == filter_value]
         if not employee_orders.empty:
-            csv_data = employee_orders.to_csv(index=False)
             st.download_button(
                 label="📥 Download Employee Orders (CSV)",
-                data=csv_data,
+                data=partial(to_csv_bytes, employee_orders),
                 file_name=f"employee_{filter_value}_orders_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv"
             )
@@ -2562,10 +2896,9 @@ def show_export_options(data, active_filter, filter_value):
         # Export product-related data
         product_orders = data['orderdetails'][data['orderdetails']['ProductID'] == filter_value]
         if not product_orders.empty:
-            csv_data = product_orders.to_csv(index=False)
             st.download_button(
                 label="📥 Download Product Orders (CSV)",
-                data=csv_data,
+                data=partial(to_csv_bytes, product_orders),
                 file_name=f"product_{filter_value}_orders_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv"
             )
@@ -2574,10 +2907,9 @@ def show_export_options(data, active_filter, filter_value):
         # Export category-related data
         category_products = data['products'][data['products']['CategoryID'] == filter_value]
         if not category_products.empty:
-            csv_data = category_products.to_csv(index=False)
             st.download_button(
                 label="📥 Download Category Products (CSV)",
-                data=csv_data,
+                data=partial(to_csv_bytes, category_products),
                 file_name=f"category_{filter_value}_products_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv"
             )
@@ -2586,16 +2918,11 @@ def show_export_options(data, active_filter, filter_value):
         # Export date range data
         start_date, end_date = filter_value
         if not data['orders'].empty and 'OrderDate' in data['orders'].columns:
-            data['orders']['OrderDate'] = pd.to_datetime(data['orders']['OrderDate'], errors='coerce')
-            date_filtered_orders = data['orders'][
-                (data['orders']['OrderDate'].dt.date >= start_date) &
-                (data['orders']['OrderDate'].dt.date <= end_date)
-            ]
+            date_filtered_orders = data['orders'][date_range_mask(data['orders']['OrderDate'], filter_value)]
             if not date_filtered_orders.empty:
-                csv_data = date_filtered_orders.to_csv(index=False)
                 st.download_button(
                     label="📥 Download Date Range Orders (CSV)",
-                    data=csv_data,
+                    data=partial(to_csv_bytes, date_filtered_orders),
                     file_name=f"orders_{start_date}_to_{end_date}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                     mime="text/csv"
                 )
@@ -2634,7 +2961,7 @@ def all_data_tables_page(data):
             if search_term:
                 # Search in all string columns
                 search_mask = pd.DataFrame([df[col].astype(str).str.contains(search_term, case=False, na=False) 
-                                          for col in df.select_dtypes(include=['object']).columns]).any()
+                                          for col in df.select_dtypes(include=['object', 'category']).columns]).any()
                 display_df = df[search_mask]
             else:
                 display_df = df
@@ -2647,27 +2974,48 @@ def all_data_tables_page(data):
             )
             
             # Download button for this table
-            csv_data = display_df.to_csv(index=False)
             st.download_button(
                 label=f"📥 Download {table_name} Data (CSV)",
-                data=csv_data,
+                data=partial(to_csv_bytes, display_df),
                 file_name=f"{table_name.lower()}_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv",
                 key=f"download_{table_name}"
             )
 
 def main():
-    # Load data
-    with st.spinner("Loading data from SQL Server..."):
-        data = load_all_data()
+    # Sidebar navigation
+    st.sidebar.title("📊 Dashboard Navigation")
+    
+    # The disk cache never expires on its own, so clearing it (together with the
+    # aggregates derived from it) is how the dashboard picks up new database rows
+    if st.sidebar.button("🔄 Refresh data", help="Reload every table from SQL Server"):
+        for cached in (load_all_data, customer_aggregates, order_aggregates, sales_aggregates, employee_aggregates):
+            cached.clear()
+        st.session_state.pop('data', None)
+    
+    # Load data once per session. Reruns then reuse the same tables instead of
+    # looking up the cache and unpickling a fresh copy of every frame; a failed
+    # load is not stored, so the next rerun retries it
+    if 'data' not in st.session_state:
+        st.session_state['load_failures'] = []
+        with st.spinner("Loading data from SQL Server..."):
+            try:
+                st.session_state['data'] = load_all_data()
+            except TableLoadError as e:
+                # A partial load is kept for this session only; the tables that
+                # loaded stay usable and Refresh data retries the rest
+                st.session_state['data'] = e.data
+                st.session_state['load_failures'] = e.failures
+            except Exception as e:
+                st.error(f"Error connecting to database: {str(e)}")
+    for failure in st.session_state.get('load_failures', []):
+        st.warning(failure)
+    data = st.session_state.get('data')
     
     if data is None:
         st.error("Failed to load data. Please check your database connection.")
         return
     
-    # Sidebar navigation
-    st.sidebar.title("📊 Dashboard Navigation")
-    
     page = st.sidebar.selectbox(
         "Choose a page:",
         ["Customer Insights", "Orders Overview", "Sales & Products", "Employees", "Data Relationships", "All Data Tables"]
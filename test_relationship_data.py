@@ -1,145 +1,172 @@
 import streamlit as st
 import pandas as pd
 import pyodbc
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from config import check_driver, get_engine_url
+from concurrent.futures import ThreadPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
+@st.cache_resource
+def get_engine():
+    """Create the SQLAlchemy engine once and share its connection pool across sessions"""
+    check_driver()
+    engine = create_engine(
+        get_engine_url(),
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=5,
+        fast_executemany=True
+    )
+    
+    # Fetch rows in large batches instead of the DB-API default of one row per fetchmany()
+    @event.listens_for(engine, "before_cursor_execute")
+    def set_cursor_arraysize(conn, cursor, statement, parameters, context, executemany):
+        cursor.arraysize = 1000
+    
+    return engine
+
+@st.cache_data(persist="disk", show_spinner=False, max_entries=2)
 def load_relationship_data():
     """Load data with proper table relationships for dropdowns"""
+    # Reuse the shared SQLAlchemy engine
+    engine = get_engine()
+    
+    # Joined queries backing the relationship dropdowns
+    queries = {
+        'orders_with_details': """
+        SELECT 
+            o.OrderID,
+            o.OrderDate,
+            o.ShipName,
+            c.CompanyName AS CustomerName,
+            c.CustomerID,
+            e.FirstName + ' ' + e.LastName AS EmployeeName,
+            e.EmployeeID
+        FROM Orders o
+        LEFT JOIN Customers c ON o.CustomerID = c.CustomerID
+        LEFT JOIN Employees e ON o.EmployeeID = e.EmployeeID
+        ORDER BY o.OrderDate DESC
+        """,
+        'products_with_categories': """
+        SELECT 
+            p.ProductID,
+            p.ProductName,
+            p.UnitPrice,
+            p.UnitsInStock,
+            c.CategoryName,
+            c.CategoryID
+        FROM Products p
+        LEFT JOIN Categories c ON p.CategoryID = c.CategoryID
+        ORDER BY p.ProductName
+        """,
+        'orderdetails_with_details': """
+        SELECT 
+            od.OrderID,
+            od.ProductID,
+            od.UnitPrice,
+            od.Quantity,
+            od.Discount,
+            p.ProductName,
+            o.OrderDate,
+            c.CompanyName AS CustomerName
+        FROM [Order Details] od
+        LEFT JOIN Products p ON od.ProductID = p.ProductID
+        LEFT JOIN Orders o ON od.OrderID = o.OrderID
+        LEFT JOIN Customers c ON o.CustomerID = c.CustomerID
+        ORDER BY o.OrderDate DESC
+        """,
+        'employees_with_orders': """
+        SELECT 
+            e.EmployeeID,
+            e.FirstName,
+            e.LastName,
+            e.Title,
+            e.City,
+            COUNT(o.OrderID) AS OrderCount
+        FROM Employees e
+        LEFT JOIN Orders o ON e.EmployeeID = o.EmployeeID
+        GROUP BY e.EmployeeID, e.FirstName, e.LastName, e.Title, e.City
+        ORDER BY OrderCount DESC
+        """,
+        'categories_with_stats': """
+        SELECT 
+            c.CategoryID,
+            c.CategoryName,
+            COUNT(p.ProductID) AS ProductCount,
+            SUM(od.UnitPrice * od.Quantity) AS TotalRevenue
+        FROM Categories c
+        LEFT JOIN Products p ON c.CategoryID = p.CategoryID
+        LEFT JOIN [Order Details] od ON p.ProductID = od.ProductID
+        GROUP BY c.CategoryID, c.CategoryName
+        ORDER BY TotalRevenue DESC
+        """
+    }
+    
+    # The queries are independent, so run them concurrently on pooled
+    # connections; each result (or error) is reported below
+    with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+        futures = {name: executor.submit(pd.read_sql, query, engine) for name, query in queries.items()}
+    
+    relationship_data = {}
+    failures = []
+    
+    # Query 1: Orders with Customer and Employee information
     try:
-        # SQL Server connection string
-        CONN_STR = (
-            r'DRIVER={SQL Server};'
-            r'SERVER=localhost\SQLEXPRESS;'
-            r'DATABASE=practicedatabase;'
-            r'Trusted_Connection=yes;'
-        )
-        
-        # Create SQLAlchemy engine
-        engine = create_engine(f'mssql+pyodbc:///?odbc_connect={CONN_STR}')
-        
-        relationship_data = {}
-        
-        # Query 1: Orders with Customer and Employee information
-        try:
-            orders_query = """
-            SELECT 
-                o.OrderID,
-                o.OrderDate,
-                o.ShipName,
-                c.CompanyName AS CustomerName,
-                c.CustomerID,
-                e.FirstName + ' ' + e.LastName AS EmployeeName,
-                e.EmployeeID
-            FROM Orders o
-            LEFT JOIN Customers c ON o.CustomerID = c.CustomerID
-            LEFT JOIN Employees e ON o.EmployeeID = e.EmployeeID
-            ORDER BY o.OrderDate DESC
-            """
-            relationship_data['orders_with_details'] = pd.read_sql(orders_query, engine)
-            print(f"✅ Loaded {len(relationship_data['orders_with_details'])} orders with details")
-        except Exception as e:
-            print(f"❌ Could not load Orders with details: {str(e)}")
-            relationship_data['orders_with_details'] = pd.DataFrame()
-        
-        # Query 2: Products with Category information
-        try:
-            products_query = """
-            SELECT 
-                p.ProductID,
-                p.ProductName,
-                p.UnitPrice,
-                p.UnitsInStock,
-                c.CategoryName,
-                c.CategoryID
-            FROM Products p
-            LEFT JOIN Categories c ON p.CategoryID = c.CategoryID
-            ORDER BY p.ProductName
-            """
-            relationship_data['products_with_categories'] = pd.read_sql(products_query, engine)
-            print(f"✅ Loaded {len(relationship_data['products_with_categories'])} products with categories")
-        except Exception as e:
-            print(f"❌ Could not load Products with categories: {str(e)}")
-            relationship_data['products_with_categories'] = pd.DataFrame()
-        
-        # Query 3: Order Details with Product and Order information
-        try:
-            orderdetails_query = """
-            SELECT 
-                od.OrderID,
-                od.ProductID,
-                od.UnitPrice,
-                od.Quantity,
-                od.Discount,
-                p.ProductName,
-                o.OrderDate,
-                c.CompanyName AS CustomerName
-            FROM [Order Details] od
-            LEFT JOIN Products p ON od.ProductID = p.ProductID
-            LEFT JOIN Orders o ON od.OrderID = o.OrderID
-            LEFT JOIN Customers c ON o.CustomerID = c.CustomerID
-            ORDER BY o.OrderDate DESC
-            """
-            relationship_data['orderdetails_with_details'] = pd.read_sql(orderdetails_query, engine)
-            print(f"✅ Loaded {len(relationship_data['orderdetails_with_details'])} order details with details")
-        except Exception as e:
-            print(f"❌ Could not load Order Details with details: {str(e)}")
-            relationship_data['orderdetails_with_details'] = pd.DataFrame()
-        
-        # Query 4: Employees with their order count
-        try:
-            employees_query = """
-            SELECT 
-                e.EmployeeID,
-                e.FirstName,
-                e.LastName,
-                e.Title,
-                e.City,
-                COUNT(o.OrderID) AS OrderCount
-            FROM Employees e
-            LEFT JOIN Orders o ON e.EmployeeID = o.EmployeeID
-            GROUP BY e.EmployeeID, e.FirstName, e.LastName, e.Title, e.City
-            ORDER BY OrderCount DESC
-            """
-            relationship_data['employees_with_orders'] = pd.read_sql(employees_query, engine)
-            print(f"✅ Loaded {len(relationship_data['employees_with_orders'])} employees with orders")
-        except Exception as e:
-            print(f"❌ Could not load Employees with orders: {str(e)}")
-            relationship_data['employees_with_orders'] = pd.DataFrame()
-        
-        # Query 5: Categories with product count and revenue
-        try:
-            categories_query = """
-            SELECT 
-                c.CategoryID,
-                c.CategoryName,
-                COUNT(p.ProductID) AS ProductCount,
-                SUM(od.UnitPrice * od.Quantity) AS TotalRevenue
-            FROM Categories c
-            LEFT JOIN Products p ON c.CategoryID = p.CategoryID
-            LEFT JOIN [Order Details] od ON p.ProductID = od.ProductID
-            GROUP BY c.CategoryID, c.CategoryName
-            ORDER BY TotalRevenue DESC
-            """
-            relationship_data['categories_with_stats'] = pd.read_sql(categories_query, engine)
-            print(f"✅ Loaded {len(relationship_data['categories_with_stats'])} categories with stats")
-        except Exception as e:
-            print(f"❌ Could not load Categories with stats: {str(e)}")
-            relationship_data['categories_with_stats'] = pd.DataFrame()
-        
-        return relationship_data
-        
+        relationship_data['orders_with_details'] = futures['orders_with_details'].result()
+        print(f"✅ Loaded {len(relationship_data['orders_with_details'])} orders with details")
     except Exception as e:
-        print(f"❌ Error loading relationship data: {str(e)}")
-        return None
+        print(f"❌ Could not load Orders with details: {str(e)}")
+        failures.append(f"Could not load Orders with details: {str(e)}")
+    
+    # Query 2: Products with Category information
+    try:
+        relationship_data['products_with_categories'] = futures['products_with_categories'].result()
+        print(f"✅ Loaded {len(relationship_data['products_with_categories'])} products with categories")
+    except Exception as e:
+        print(f"❌ Could not load Products with categories: {str(e)}")
+        failures.append(f"Could not load Products with categories: {str(e)}")
+    
+    # Query 3: Order Details with Product and Order information
+    try:
+        relationship_data['orderdetails_with_details'] = futures['orderdetails_with_details'].result()
+        print(f"✅ Loaded {len(relationship_data['orderdetails_with_details'])} order details with details")
+    except Exception as e:
+        print(f"❌ Could not load Order Details with details: {str(e)}")
+        failures.append(f"Could not load Order Details with details: {str(e)}")
+    
+    # Query 4: Employees with their order count
+    try:
+        relationship_data['employees_with_orders'] = futures['employees_with_orders'].result()
+        print(f"✅ Loaded {len(relationship_data['employees_with_orders'])} employees with orders")
+    except Exception as e:
+        print(f"❌ Could not load Employees with orders: {str(e)}")
+        failures.append(f"Could not load Employees with orders: {str(e)}")
+    
+    # Query 5: Categories with product count and revenue
+    try:
+        relationship_data['categories_with_stats'] = futures['categories_with_stats'].result()
+        print(f"✅ Loaded {len(relationship_data['categories_with_stats'])} categories with stats")
+    except Exception as e:
+        print(f"❌ Could not load Categories with stats: {str(e)}")
+        failures.append(f"Could not load Categories with stats: {str(e)}")
+    
+    # Raised rather than returned with empty frames so a partial load is never persisted
+    if failures:
+        raise RuntimeError("; ".join(failures))
+    
+    return relationship_data
 
 if __name__ == "__main__":
     print("🔍 Testing Relationship Data Loading...")
     print("=" * 50)
     
-    relationship_data = load_relationship_data()
+    # Connection errors and failed queries are raised by the loader so they never reach the persisted cache
+    try:
+        relationship_data = load_relationship_data()
+    except Exception as e:
+        print(f"❌ Error loading relationship data: {str(e)}")
+        relationship_data = None
     
     if relationship_data:
         print("\n📊 Relationship Data Summary:")